@@ -3,6 +3,12 @@
 This module exports two classes ``Stage`` and ``GameObj`` and
 a global object ``mouse_state``.
 
+Collision masks of game objects are cached in the global
+object ``mask_bank`` (see ``MaskBank``), rotated images
+in ``rotation_cache`` (see ``RotationCache``), glyphs of
+drawn texts in ``text_renderer`` (see ``TextRenderer`` and
+``Label``).
+
 Also this module implements all hook methods of Pygame Zero,
 i. e. ``draw``, ``update``, ``on_mouse_down``, 
 ``on_mouse_up``, ``on_mouse_move``, ``on_key_down``, 
@@ -11,16 +17,29 @@ current stage's respective methods (see ``Stage.show()``
 and ``Stage.current``).
 """
 
+import os
 import sys
+import json
 import math
+import random
 import functools
 import warnings
+import weakref
+import collections
+import multiprocessing
 
 import pygame
+import numpy
 
-from pgzero.actor import Actor
+from pgzero.actor import Actor, transform_anchor, calculate_anchor
+from pgzero.rect import ZRect
 from pgzero.constants import mouse
 from pgzero import spellcheck
+from pgzero import loaders
+from pgzero import ptext
+import pgzero.clock
+import pgzero.game
+import pgzero.screen
 
 __version__ = "0.9"
 __author__ = "Robert Garmann"
@@ -80,7 +99,7 @@ _ALL_PREVIOUS_TYPES = []
 """Collects type names that have been spelling-warned."""
 
 
-def _call_base_and_sub_op(a, basecls, op_name, **kwargs):
+def _call_base_and_sub_op(a, basecls, op_name, call_base=True, **kwargs):
     """Call ``op_name`` on ``a`` for ``basecls`` AND then for ``a`` itself.
 
     This function relieves a subclass of ``basecls`` from calling super-methods
@@ -90,6 +109,8 @@ def _call_base_and_sub_op(a, basecls, op_name, **kwargs):
 
     This allows the book to introduce methods as simple attributes in objects
     that easlily can be added to an object.
+
+    If ``call_base`` is ``False``, only the overwriting method is called.
     """
 
     debug = False
@@ -99,8 +120,9 @@ def _call_base_and_sub_op(a, basecls, op_name, **kwargs):
         print("start of _call_base_and_sub_op is going to call ", op_name)
 
     # call method of base class first:
-    baseop = basecls.__dict__.get(op_name)
-    baseop(a, **kwargs)
+    if call_base:
+        baseop = basecls.__dict__.get(op_name)
+        baseop(a, **kwargs)
 
     #
     # search for overwriting method in a's class or in a itself:
@@ -300,6 +322,502 @@ The value will be ``True`` after the next mouse movement.
 """
 
 
+class _RectArrays:
+    """Rectangles of all game objects of one class in a NumPy array.
+
+    Each row holds ``left, top, right, bottom`` of one game object.
+    This allows to test one rectangle against all game objects of
+    the class in a single vectorized operation. A second array holds
+    the collision layers.
+    """
+
+    def __init__(self):
+        self.game_objects = []
+        self.rects = numpy.zeros((16, 4))
+        self.layers = numpy.zeros(16, dtype=numpy.int64)
+        self.slots = {}  # game object -> row in rects
+
+    def add(self, game_obj, bounds):
+        slot = len(self.game_objects)
+        if slot == len(self.rects):
+            # double the capacity:
+            self.rects = numpy.concatenate((self.rects, self.rects))
+            self.layers = numpy.concatenate((self.layers, self.layers))
+        self.game_objects.append(game_obj)
+        self.slots[game_obj] = slot
+        self.update(game_obj, bounds)
+
+    def remove(self, game_obj):
+        # Move the last row into the gap, so the rows stay dense:
+        slot = self.slots.pop(game_obj)
+        last = self.game_objects.pop()
+        if last is not game_obj:
+            self.game_objects[slot] = last
+            self.slots[last] = slot
+            self.rects[slot] = self.rects[len(self.game_objects)]
+            self.layers[slot] = self.layers[len(self.game_objects)]
+
+    def update(self, game_obj, bounds):
+        slot = self.slots[game_obj]
+        self.rects[slot] = bounds
+        self.layers[slot] = game_obj.collision_layer
+
+    def colliding(self, bounds, layer_mask=None):
+        """Return the game objects whose rectangles collide with ``bounds``.
+
+        If ``layer_mask`` is given, only game objects whose layer bit
+        is set in the mask are returned.
+        """
+        left, top, right, bottom = bounds
+        count = len(self.game_objects)
+        rects = self.rects[:count]
+        hit = (rects[:, 0] < right) & (rects[:, 2] > left) & \
+            (rects[:, 1] < bottom) & (rects[:, 3] > top)
+        if layer_mask is not None:
+            hit &= (layer_mask >> self.layers[:count]) & 1 == 1
+        return [self.game_objects[i] for i in numpy.flatnonzero(hit)]
+
+
+class _SpatialGrid:
+    """A uniform grid that maps cells to the game objects touching them.
+
+    Each game object is registered in all cells that its collision
+    bounds ``(left, top, right, bottom)`` touch.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}   # (column, row) -> set of game objects
+        self.ranges = {}  # game object -> (col0, row0, col1, row1)
+        self.bounds = {}  # game object -> bounds
+
+    def cell_range(self, bounds):
+        cs = self.cell_size
+        return (math.floor(bounds[0] / cs), math.floor(bounds[1] / cs),
+                math.floor(bounds[2] / cs), math.floor(bounds[3] / cs))
+
+    def add(self, game_obj, bounds):
+        cell_range = self.ranges[game_obj] = self.cell_range(bounds)
+        self.bounds[game_obj] = bounds
+        col0, row0, col1, row1 = cell_range
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                cell = self.cells.get((col, row))
+                if cell is None:
+                    cell = self.cells[(col, row)] = set()
+                cell.add(game_obj)
+
+    def remove(self, game_obj):
+        col0, row0, col1, row1 = self.ranges.pop(game_obj)
+        del self.bounds[game_obj]
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                cell = self.cells[(col, row)]
+                cell.discard(game_obj)
+                if not cell:
+                    del self.cells[(col, row)]
+
+    def update(self, game_obj, bounds):
+        if self.cell_range(bounds) == self.ranges[game_obj]:
+            self.bounds[game_obj] = bounds
+        else:
+            self.remove(game_obj)
+            self.add(game_obj, bounds)
+
+    def query(self, bounds):
+        """Return the set of game objects in cells touching ``bounds``."""
+        col0, row0, col1, row1 = self.cell_range(bounds)
+        result = set()
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                cell = self.cells.get((col, row))
+                if cell is not None:
+                    result.update(cell)
+        return result
+
+    def walk(self, x, y, dx, dy, length):
+        """Walk the cells along a ray with a digital differential analyzer.
+
+        The ray starts at ``(x, y)`` and has the unit direction
+        ``(dx, dy)``. Yield the game objects of each non-empty cell
+        and the distance at which the ray leaves the cell.
+        """
+        cs = self.cell_size
+        col = math.floor(x / cs)
+        row = math.floor(y / cs)
+        step_col = 1 if dx > 0 else -1
+        step_row = 1 if dy > 0 else -1
+        if dx != 0:
+            next_col = ((col + (dx > 0)) * cs - x) / dx
+            delta_col = cs / abs(dx)
+        else:
+            next_col = delta_col = math.inf
+        if dy != 0:
+            next_row = ((row + (dy > 0)) * cs - y) / dy
+            delta_row = cs / abs(dy)
+        else:
+            next_row = delta_row = math.inf
+        t = 0
+        while t <= length:
+            cell = self.cells.get((col, row))
+            if next_col < next_row:
+                if cell:
+                    yield cell, next_col
+                t = next_col
+                col += step_col
+                next_col += delta_col
+            else:
+                if cell:
+                    yield cell, next_row
+                t = next_row
+                row += step_row
+                next_row += delta_row
+
+
+def _ray_enters_bounds(x, y, dx, dy, bounds):
+    """Return the distance at which a ray enters ``bounds`` or ``None``.
+
+    If the ray starts inside the bounds, the distance is 0.
+    """
+    t_min = 0
+    t_max = math.inf
+    for start, d, low, high in ((x, dx, bounds[0], bounds[2]),
+                                (y, dy, bounds[1], bounds[3])):
+        if d == 0:
+            if start < low or start > high:
+                return None
+        else:
+            t0 = (low - start) / d
+            t1 = (high - start) / d
+            if t0 > t1:
+                t0, t1 = t1, t0
+            t_min = max(t_min, t0)
+            t_max = min(t_max, t1)
+            if t_min > t_max:
+                return None
+    return t_min
+
+
+def _merge_rects(rects):
+    """Return a list of rectangles where overlapping ones are united."""
+    result = []
+    for rect in rects:
+        i = rect.collidelist(result)
+        while i != -1:
+            rect = rect.union(result.pop(i))
+            i = rect.collidelist(result)
+        result.append(rect)
+    return result
+
+
+def _alpha_bounding_rect(surface):
+    """Return the rectangle around all visible pixels of ``surface``.
+
+    Return ``None`` if all pixels are transparent. This is a faster
+    ``Surface.get_bounding_rect`` for surfaces with per pixel alpha:
+    numpy looks at a view of the alpha values, first column-wise and
+    then only within the columns found.
+    """
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    try:
+        xs = numpy.flatnonzero(alpha.any(axis=1))
+        if not len(xs):
+            return None
+        ys = numpy.flatnonzero(alpha[xs[0]:xs[-1] + 1].any(axis=0))
+    finally:
+        del alpha  # unlocks the surface
+    return pygame.Rect(xs[0], ys[0], xs[-1] - xs[0] + 1, ys[-1] - ys[0] + 1)
+
+
+def _position_of(pos_or_game_obj):
+    """Return the position of a game object or the position itself."""
+    if isinstance(pos_or_game_obj, GameObj):
+        return pos_or_game_obj.pos
+    return pos_or_game_obj
+
+
+def poisson_disk_positions(count, min_distance, area, exclude=(), tries=30):
+    """Return up to ``count`` random positions at least ``min_distance`` apart.
+
+    ``area`` is a ``(left, top, right, bottom)`` tuple. ``exclude`` is a
+    list of ``(pos, radius)`` tuples, where ``pos`` is a position or a
+    game object. No position lies within such an exclusion zone.
+
+    Random candidates are thrown into the area and kept if they are far
+    enough from all positions found so far ("dart throwing"). A grid
+    with cells of size ``min_distance / sqrt(2)`` holds at most one
+    position each, so checking a candidate only needs the neighbouring
+    cells. At most ``tries * count`` candidates are thrown, so the work
+    grows with ``count`` and not with the size of the area. The result
+    may be shorter than ``count`` if the area is too small or too
+    crowded.
+
+    ``min_distance`` must be greater than 0.
+    """
+    if min_distance <= 0:
+        raise ValueError(
+            "min_distance must be greater than 0, got %r" % (min_distance,))
+    left, top, right, bottom = area
+    zones = [(_position_of(pos), radius) for pos, radius in exclude]
+    cell_size = min_distance / math.sqrt(2)
+    cells = {}  # (column, row) -> position
+    result = []
+
+    def cell_of(p):
+        return (math.floor((p[0] - left) / cell_size),
+                math.floor((p[1] - top) / cell_size))
+
+    def is_valid(p):
+        for (x, y), radius in zones:
+            if math.hypot(p[0] - x, p[1] - y) < radius:
+                return False
+        col, row = cell_of(p)
+        for c in range(col - 2, col + 3):
+            for r in range(row - 2, row + 3):
+                q = cells.get((c, r))
+                if q is not None and \
+                        math.hypot(p[0] - q[0], p[1] - q[1]) < min_distance:
+                    return False
+        return True
+
+    for dummy in range(tries * count):
+        if len(result) >= count:
+            break
+        p = (random.uniform(left, right), random.uniform(top, bottom))
+        if is_valid(p):
+            cells[cell_of(p)] = p
+            result.append(p)
+    return result
+
+
+class TileMap:
+    """A grid of tiles for static walls and obstacles of a level.
+
+    Tile ids are numbers from 0 to 255, stored in one ``bytearray``.
+    Tiles whose ids are in ``solid_tiles`` block game objects. The map
+    is drawn from ``tile_images``, a dictionary that maps tile ids to
+    image names. Tile 0 is empty by convention.
+
+    Attach a tile map to a stage by setting the stage's ``tile_map``
+    attribute. Then the stage draws the map over the background, and
+    ``GameObj.can_move`` checks the path against solid tiles. The
+    tiles take no part in dispatching and collision queries, so large
+    static levels cost almost nothing per frame.
+    """
+
+    def __init__(self, columns, rows, tile_size=32, solid_tiles=(1,),
+                 tile_images=None):
+        self.columns = columns
+        self.rows = rows
+        self.tile_size = tile_size
+        self.tiles = bytearray(columns * rows)
+        self._solid = bytearray(256)  # tile id -> 1 if solid
+        for tile in solid_tiles:
+            self._solid[tile] = 1
+        self.tile_images = tile_images or {}
+        self._surface = None  # prerendered tiles
+
+    @classmethod
+    def from_strings(cls, lines, tile_size=32, legend=None, **kwargs):
+        """Create a tile map from a list of strings, one per row.
+
+        ``legend`` maps characters to tile ids. By default ``"#"`` is
+        tile 1, all other characters are tile 0.
+        """
+        if legend is None:
+            legend = {"#": 1}
+        result = cls(max(len(line) for line in lines), len(lines),
+                     tile_size, **kwargs)
+        for row, line in enumerate(lines):
+            for column, char in enumerate(line):
+                result.set_tile(column, row, legend.get(char, 0))
+        return result
+
+    def get_tile(self, column, row):
+        """Return the tile id of a cell, 0 outside the map."""
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return self.tiles[row * self.columns + column]
+        return 0
+
+    def set_tile(self, column, row, tile):
+        """Change the tile id of a cell."""
+        self.tiles[row * self.columns + column] = tile
+        self._surface = None
+
+    def cell_at(self, pos):
+        """Return ``(column, row)`` of the cell at a position."""
+        return (math.floor(pos[0] / self.tile_size),
+                math.floor(pos[1] / self.tile_size))
+
+    def is_solid_cell(self, column, row):
+        """Check if the cell contains a solid tile."""
+        return self._solid[self.get_tile(column, row)] == 1
+
+    def is_solid_at(self, pos):
+        """Check if there is a solid tile at a position."""
+        return self.is_solid_cell(*self.cell_at(pos))
+
+    def is_solid_in(self, bounds):
+        """Check if ``(left, top, right, bottom)`` touches a solid tile."""
+        ts = self.tile_size
+        # The right and bottom border belongs to the next cell:
+        for row in range(math.floor(bounds[1] / ts),
+                         math.ceil(bounds[3] / ts)):
+            for column in range(math.floor(bounds[0] / ts),
+                                math.ceil(bounds[2] / ts)):
+                if self.is_solid_cell(column, row):
+                    return True
+        return False
+
+    def can_move(self, game_obj, distance=None):
+        """Check, if ``game_obj`` can move without touching solid tiles.
+
+        The whole path is checked in steps of half a tile, so fast
+        game objects cannot pass through thin walls.
+        """
+        hop_x, hop_y = game_obj.next_hop(distance)
+        left, top, right, bottom = game_obj._collision_bounds()
+        steps = math.ceil(math.hypot(hop_x, hop_y) / (self.tile_size / 2))
+        for step in range(1, steps + 1):
+            dx = hop_x * step / steps
+            dy = hop_y * step / steps
+            if self.is_solid_in((left + dx, top + dy,
+                                 right + dx, bottom + dy)):
+                return False
+        return True
+
+    def draw(self, camera=None):
+        """Draw all tiles that have an image.
+
+        With a ``camera``, draw the part of the map that it shows.
+        """
+        if self._surface is None:
+            ts = self.tile_size
+            self._surface = pygame.Surface(
+                (self.columns * ts, self.rows * ts), pygame.SRCALPHA)
+            for row in range(self.rows):
+                for column in range(self.columns):
+                    name = self.tile_images.get(self.get_tile(column, row))
+                    if name is not None:
+                        self._surface.blit(loaders.images.load(name),
+                                           (column * ts, row * ts))
+        if camera is None:
+            _PGZ.screen.blit(self._surface, (0, 0))
+        elif camera.zoom == 1:
+            _PGZ.screen.blit(self._surface,
+                             camera.world_to_screen((0, 0)))
+        else:
+            left, top, right, bottom = camera.viewport(
+                _PGZ.screen.surface.get_size())
+            area = pygame.Rect(math.floor(left), math.floor(top),
+                               math.ceil(right - left) + 1,
+                               math.ceil(bottom - top) + 1)
+            area = area.clip(self._surface.get_rect())
+            if area.w > 0 and area.h > 0:
+                size = (round(area.w * camera.zoom),
+                        round(area.h * camera.zoom))
+                _PGZ.screen.blit(
+                    pygame.transform.scale(
+                        self._surface.subsurface(area), size),
+                    camera.world_to_screen(area.topleft))
+
+
+class Camera:
+    """The part of a stage's world that is shown on the screen.
+
+    Without a camera, stage coordinates are screen coordinates. When a
+    stage has a camera, game objects live in a larger world and the
+    camera shows the area whose top left corner is at the world
+    position ``(left, top)``, enlarged by ``zoom``. Scroll the world
+    by changing ``left`` and ``top`` or with ``scroll`` and
+    ``center_on``::
+
+        class Level(Stage):
+            def __init__(self):
+                self.camera = Camera()
+
+            def update(self):
+                self.camera.center_on(self.player)
+
+    The stage draws only the game objects in view. It finds them in
+    its spatial grid, so the costs depend on the visible part of the
+    world and not on its size.
+    """
+
+    max_scaled_images = 4096
+    """Number of scaled images a camera keeps.
+
+    If more images are scaled, the least recently used is dropped.
+    """
+
+    _cameras = weakref.WeakSet()
+    """All cameras, see ``_forget``."""
+
+    def __init__(self, left=0, top=0, zoom=1):
+        self.left = left
+        self.top = top
+        self.zoom = zoom
+        # (surface, zoom) -> scaled surface:
+        self._scaled = collections.OrderedDict()
+        Camera._cameras.add(self)
+
+    def viewport(self, screen_size=None):
+        """Return the visible world area ``(left, top, right, bottom)``."""
+        if screen_size is None:
+            screen_size = _PGZ.screen.surface.get_size()
+        return (self.left, self.top,
+                self.left + screen_size[0] / self.zoom,
+                self.top + screen_size[1] / self.zoom)
+
+    def world_to_screen(self, pos):
+        """Convert a world position to a screen position."""
+        return ((pos[0] - self.left) * self.zoom,
+                (pos[1] - self.top) * self.zoom)
+
+    def screen_to_world(self, pos):
+        """Convert a screen position, e. g. of the mouse, to the world."""
+        return (pos[0] / self.zoom + self.left,
+                pos[1] / self.zoom + self.top)
+
+    def scroll(self, dx, dy):
+        """Move the visible area by ``(dx, dy)`` world pixels."""
+        self.left += dx
+        self.top += dy
+
+    def center_on(self, pos_or_game_obj):
+        """Scroll so that a position or a game object is in the center."""
+        x, y = _position_of(pos_or_game_obj)
+        width, height = _PGZ.screen.surface.get_size()
+        self.left = x - width / 2 / self.zoom
+        self.top = y - height / 2 / self.zoom
+
+    def _scale(self, surface):
+        """Return ``surface`` scaled by ``zoom``, cached per image."""
+        key = (surface, self.zoom)
+        scaled = self._scaled.get(key)
+        if scaled is None:
+            w, h = surface.get_size()
+            scaled = self._scaled[key] = pygame.transform.scale(
+                surface, (max(1, round(w * self.zoom)),
+                          max(1, round(h * self.zoom))))
+            if len(self._scaled) > self.max_scaled_images:
+                self._scaled.popitem(last=False)
+        else:
+            self._scaled.move_to_end(key)
+        return scaled
+
+    @classmethod
+    def _forget(cls, surface):
+        """Drop the scaled images of ``surface`` from all cameras.
+
+        This is necessary when ``surface`` has been changed in place,
+        e. g. by a ``Terrain``.
+        """
+        for camera in cls._cameras:
+            for key in [key for key in camera._scaled if key[0] is surface]:
+                del camera._scaled[key]
+
+
 class Stage:
     """The game can consist of several stages.
 
@@ -313,10 +831,153 @@ class Stage:
 
     current = None
     DEFAULT_EDGE = 0
+    GRID_CELL_SIZE = 64
+    """Cell size in pixels of the spatial grid used by queries."""
+    LAYER_COUNT = 32
+    """Number of collision layers, see ``GameObj.collision_layer``.
+
+    At most ``MAX_LAYER_COUNT`` layers are possible.
+    """
+    MAX_LAYER_COUNT = 63
+    """Limit of ``LAYER_COUNT``.
+
+    The layers that collide with a layer are stored as bits of a 64 bit
+    integer.
+    """
+
+    tile_map = None
+    """A ``TileMap`` with the static walls of this stage or ``None``."""
+
+    camera = None
+    """A ``Camera`` for a world larger than the screen or ``None``.
+
+    With a camera, the background image stays in place, while the
+    tile map and the game objects scroll. Overwritten ``draw`` methods
+    of game objects draw in screen coordinates (see
+    ``Camera.world_to_screen``). The mouse hooks and ``mouse_state``
+    get world coordinates. Static game objects and ``use_dirty_rects``
+    have no effect.
+    """
+
+    use_dirty_rects = False
+    """Draw only the areas that changed since the last frame.
+
+    In this mode, a frame restores the background and redraws the game
+    objects only where game objects moved, turned, changed their image,
+    appeared or left. The changed areas are stored in ``dirty_rects``;
+    a main loop of its own may pass them to ``pygame.display.update``.
+
+    Overwritten ``draw`` methods of game objects and of the stage draw
+    onto a transparent layer above all game objects, together with the
+    markers. Its changed area is redrawn each frame as well. Since the
+    area of an overwritten ``draw`` method is unknown, the layer is
+    searched for it each frame. Without overwritten ``draw`` methods,
+    this search is not necessary.
+    """
+
+    _last_drawn = None
+    """The stage that has been drawn last (class attribute)."""
+
+    _frame_captures = None
+    """While drawing: the frames to capture afterwards (class attribute).
+
+    A list of (exporter, slot, frame number) tuples, see
+    ``FrameExporter.capture``.
+    """
+
+    resolve_iterations = 0
+    """Push-out iterations per update, 0 means no collision resolution.
+
+    See ``resolve_collisions``. Set this attribute in your stage
+    in order to keep ``solid`` game objects apart.
+    """
+
+    tick_rate = None
+    """Updates per second with a fixed time step, or ``None``.
+
+    By default, the stage is updated once per frame. If ``tick_rate``
+    is set, e. g. to 30, ``update`` is called exactly that many times
+    per second of playing time, i. e. none, one, or several times per
+    frame. Then the game speed does not depend on the frame rate. The
+    stage draws the images of game objects between their positions
+    and angles before and after the last update, so the movements
+    look smooth even if there are more frames than updates. Overwritten
+    ``draw`` methods and markers use the current state.
+
+    After slow frames, at most ``max_ticks_per_frame`` updates are
+    made up; the game slows down instead of falling further behind.
+    """
+
+    max_ticks_per_frame = 5
+    """Maximum number of updates per frame with a fixed time step."""
+
+    render_scale = 1
+    """Scale of the internal drawing resolution relative to the window.
+
+    With e. g. ``render_scale = 0.5`` the stage draws its images at
+    half the width and height and enlarges the result to the window
+    once per frame, which is cheaper on slow hardware. The images are
+    scaled down once and then cached. Stage coordinates stay the same,
+    so the mouse hooks and ``mouse_state`` get positions in stage
+    coordinates as before. Overwritten ``draw`` methods and markers
+    draw at full resolution above all images; ``use_dirty_rects`` has
+    no effect.
+    """
+
+    smooth_scaling = False
+    """Enlarge the internal image with ``smoothscale`` instead of ``scale``.
+
+    See ``render_scale``.
+    """
+
+    show_markers = True
+    """Draw the markers of game objects (see ``GameObj.show_markers``).
+
+    Set ``Stage.show_markers = False`` in order to hide the markers on
+    all stages, or set the attribute of a single stage. The markers of
+    all game objects are drawn in one pass onto a transparent layer
+    above the game objects. Without markers this costs nothing.
+    """
 
     def __new__(typ, *args, **kwargs):
         result = object.__new__(typ, *args, **kwargs)
         result.game_objects = []
+        result._rect_arrays = {}  # class -> _RectArrays
+        result._moved_game_objects = set()
+        result._grid = _SpatialGrid(typ.GRID_CELL_SIZE)
+        # fast game object -> (start center x, y, clock time):
+        result._sweep_starts = {}
+        # Bit j of _layer_masks[i] is set if layers i and j collide:
+        layer_count = min(typ.LAYER_COUNT, typ.MAX_LAYER_COUNT)
+        result._layer_masks = [(1 << layer_count) - 1] * layer_count
+        # dirty rectangle drawing:
+        result.dirty_rects = []
+        result._drawn_rects = {}  # game object -> rect of last drawing
+        result._redraw_game_objects = set()
+        result._removed_rects = []
+        result._z_order = None  # game object -> index in game_objects
+        result._custom_drawers = None  # game objects overwriting draw
+        result._overlay = None
+        result._overlay_rect = None
+        result._drawn_background = None
+        result._background = (None, None)  # (image name, surface)
+        result._static_layer_surface = None
+        result._static_layer_key = None
+        # fixed time step:
+        result._accumulator = 0.0
+        result._previous_states = {}  # game object -> (x, y, angle)
+        result._alpha = 1.0
+        # markers:
+        result._marked_game_objects = None
+        result._marker_surface = None
+        result._marker_rect = None
+        # game objects playing a clip with frame_duration:
+        result._timed_animations = set()
+        result._dt = 1 / 60  # seconds per update
+        # internal render resolution:
+        result._render_surface = None
+        result._render_camera = None
+        result._scaled_background = (None, None)  # (original, scaled)
         return result
 
     def __init__(self, background_image=None):
@@ -359,6 +1020,257 @@ class Stage:
         # they may already be off the stage.
         return filter(pred, self.game_objects)
 
+    def set_layer_collision(self, layer, other_layer, collide=True):
+        """Define whether game objects of two collision layers collide.
+
+        Initially all layers collide with each other. E. g. if worms on
+        layer 1 shall not collide with each other, call::
+
+            stage.set_layer_collision(1, 1, False)
+
+        Game objects whose layers do not collide never ``overlaps``
+        and are skipped by all collision queries of this stage.
+        """
+        for a, b in ((layer, other_layer), (other_layer, layer)):
+            self._check_layer(a)
+            if collide:
+                self._layer_masks[a] |= 1 << b
+            else:
+                self._layer_masks[a] &= ~(1 << b)
+
+    @classmethod
+    def _check_layer(cls, layer, count=None):
+        """Raise a ``ValueError`` if ``layer`` is no collision layer.
+
+        The layer must be below ``count``, by default below
+        ``LAYER_COUNT`` and ``MAX_LAYER_COUNT``.
+        """
+        if count is None:
+            count = min(cls.LAYER_COUNT, cls.MAX_LAYER_COUNT)
+        if not 0 <= layer < count:
+            raise ValueError(
+                "Collision layer must be between 0 and %d, got %r" %
+                (count - 1, layer))
+
+    def layers_collide(self, layer, other_layer):
+        """Check whether game objects of two collision layers collide."""
+        return (self._layer_masks[layer] >> other_layer) & 1 == 1
+
+    def get_colliding_objects(self, rect, cls=object):
+        """Return game objects of given class colliding with ``rect``.
+
+        Only bounding rectangles are compared. The test is done for all
+        game objects of the class at once, so this is much faster than
+        calling ``colliderect`` in a loop.
+        """
+        r = ZRect(rect)
+        return self._colliding((r.left, r.top, r.right, r.bottom), cls)
+
+    def _colliding(self, bounds, cls, layer=None):
+        """Helper: vectorized test of ``(left, top, right, bottom)``.
+
+        If ``layer`` is given, skip game objects whose layers
+        do not collide with it.
+        """
+        self._update_moved_game_objects()
+        layer_mask = None if layer is None else self._layer_masks[layer]
+        result = []
+        for typ, arrays in self._rect_arrays.items():
+            if issubclass(typ, cls):
+                result.extend(arrays.colliding(bounds, layer_mask))
+        return result
+
+    def get_overlapping_objects(self, game_obj, cls=object):
+        """Return game objects of given class overlapping ``game_obj``.
+
+        This is the same as checking ``game_obj.overlaps(obj)`` for all
+        objects of ``get_game_objects(cls)``, but only the objects whose
+        bounding rectangles collide are checked exactly.
+        """
+        left, top, right, bottom = game_obj._collision_bounds()
+        hop = game_obj._sweep()
+        if hop is not None:
+            # include the bounds at the start of the sweep:
+            left = min(left, left - hop[0])
+            top = min(top, top - hop[1])
+            right = max(right, right - hop[0])
+            bottom = max(bottom, bottom - hop[1])
+        candidates = self._colliding(
+            (left, top, right, bottom), cls, game_obj.collision_layer)
+        # Fast game objects may have passed game_obj during this update:
+        candidates.extend(obj for obj in self._sweep_starts
+                          if isinstance(obj, cls) and obj not in candidates)
+        return [obj for obj in candidates
+                if obj is not game_obj and game_obj.overlaps(obj)]
+
+    def raycast(self, origin, angle_or_target, cls=object, max_distance=None):
+        """Return the first game object of given class hit by a ray.
+
+        The ray starts at ``origin``, which is a position or a game
+        object. ``angle_or_target`` is either a direction in degrees
+        (like ``GameObj.angle``, see ``GameObj.next_hop``) or a target
+        position or game object. Game objects given as origin or
+        target are never hit.
+
+        The ray ends after ``max_distance`` pixels, at the target, or
+        at the farthest corner of the stage. If nothing is hit, return
+        ``None``. Hits are checked against the bounding rectangles of
+        the collision shapes.
+
+        If ``origin`` is a game object, game objects on collision layers
+        that do not collide with its layer are not hit (see
+        ``set_layer_collision``).
+        """
+        hits = self._cast(origin, angle_or_target, cls, max_distance, True)
+        return hits[0] if hits else None
+
+    def segment_query(self, start, end, cls=object):
+        """Return all game objects of given class crossed by a segment.
+
+        ``start`` and ``end`` are positions or game objects. The result
+        is sorted by distance from ``start``. Collision layers count as
+        with ``raycast``.
+        """
+        return self._cast(start, end, cls, None, False)
+
+    def has_line_of_sight(self, start, end, cls=object):
+        """Check, if no game object of given class blocks the segment.
+
+        Typically ``start`` is the looking game object and ``end`` is
+        the game object it looks for.
+        """
+        return self.raycast(start, end, cls) is None
+
+    def within_radius(self, pos, radius, cls=object):
+        """Return game objects of given class within ``radius`` of ``pos``.
+
+        ``pos`` is a position or a game object, which itself is not part
+        of the result. Distances are measured between centers. The result
+        is sorted by distance. If ``pos`` is a game object, game objects
+        on collision layers that do not collide with its layer are left
+        out.
+        """
+        result, distances, dummy = self._nearby(pos, radius, cls)
+        return [game_obj for game_obj, distance in zip(result, distances)
+                if distance <= radius]
+
+    def nearest(self, pos, cls=object, k=1):
+        """Return the ``k`` game objects of given class nearest to ``pos``.
+
+        ``pos`` is a position or a game object, which itself is not part
+        of the result. Distances are measured between centers. The result
+        is sorted by distance and may be shorter than ``k``, if there are
+        not enough game objects. Collision layers count as with
+        ``within_radius``.
+        """
+        radius = self.GRID_CELL_SIZE
+        while True:
+            result, distances, complete = self._nearby(pos, radius, cls)
+            if complete:
+                return result[:k]
+            # Game objects outside the radius may be nearer than those
+            # found in the searched cells, but not nearer than the radius:
+            count = numpy.searchsorted(distances, radius, side="right")
+            if count >= k:
+                return result[:k]
+            radius *= 2
+
+    def _nearby(self, pos, radius, cls):
+        """Helper: find game objects near ``pos`` using the grid.
+
+        Search all cells touching the square around the circle with
+        ``radius``. Return the game objects found there sorted by
+        distance, their distances, and whether the cells contained
+        all game objects of the class.
+        """
+        self._update_moved_game_objects()
+        x, y = _position_of(pos)
+        total = sum(len(arrays.game_objects)
+                    for typ, arrays in self._rect_arrays.items()
+                    if issubclass(typ, cls))
+        candidates = [
+            game_obj
+            for game_obj in self._grid.query(
+                (x - radius, y - radius, x + radius, y + radius))
+            if isinstance(game_obj, cls)]
+        complete = len(candidates) == total
+        candidates = [game_obj for game_obj in candidates
+                      if game_obj is not pos]
+        if isinstance(pos, GameObj):
+            layer = pos.collision_layer
+            candidates = [game_obj for game_obj in candidates
+                          if self.layers_collide(layer,
+                                                 game_obj.collision_layer)]
+        if not candidates:
+            return [], numpy.zeros(0), complete
+        bounds = numpy.array(
+            [self._grid.bounds[game_obj] for game_obj in candidates])
+        distances = numpy.hypot((bounds[:, 0] + bounds[:, 2]) / 2 - x,
+                                (bounds[:, 1] + bounds[:, 3]) / 2 - y)
+        order = numpy.argsort(distances, kind="stable")
+        return [candidates[i] for i in order], distances[order], complete
+
+    def _cast(self, origin, angle_or_target, cls, max_distance, first_only):
+        """Helper: walk the spatial grid along a ray and collect hits."""
+        self._update_moved_game_objects()
+        ignore = [p for p in (origin, angle_or_target)
+                  if isinstance(p, GameObj)]
+        layer = origin.collision_layer if isinstance(origin, GameObj) \
+            else None
+        x, y = _position_of(origin)
+        if isinstance(angle_or_target, (int, float)):
+            rad = math.radians(angle_or_target)
+            dx, dy = math.cos(rad), -math.sin(rad)
+            length = max(math.hypot(x - cx, y - cy)
+                         for cx in (0, _PGZ.WIDTH) for cy in (0, _PGZ.HEIGHT))
+        else:
+            tx, ty = _position_of(angle_or_target)
+            length = math.hypot(tx - x, ty - y)
+            if length == 0:
+                return []
+            dx, dy = (tx - x) / length, (ty - y) / length
+        if max_distance is not None:
+            length = min(length, max_distance)
+
+        hits = []  # (distance, game object)
+        seen = set()
+        for cell, cell_exit in self._grid.walk(x, y, dx, dy, length):
+            for game_obj in cell:
+                if game_obj in seen:
+                    continue
+                seen.add(game_obj)
+                if not isinstance(game_obj, cls) or game_obj in ignore:
+                    continue
+                if layer is not None and not self.layers_collide(
+                        layer, game_obj.collision_layer):
+                    continue
+                t = _ray_enters_bounds(
+                    x, y, dx, dy, self._grid.bounds[game_obj])
+                if t is not None and t <= length:
+                    hits.append((t, game_obj))
+            # Objects not seen yet can only be hit behind this cell:
+            if first_only and hits and \
+                    min(hit[0] for hit in hits) <= cell_exit:
+                break
+        hits.sort(key=lambda hit: hit[0])
+        return [game_obj for dummy, game_obj in hits]
+
+    def _add_game_object(self, game_obj):
+        self._check_layer(game_obj.collision_layer)
+        self.game_objects.append(game_obj)
+        self._game_objects_changed()
+        if game_obj.static:
+            self._static_objects_changed()
+        self._redraw_game_objects.add(game_obj)
+        bounds = game_obj._collision_bounds()
+        arrays = self._rect_arrays.get(type(game_obj))
+        if arrays is None:
+            arrays = self._rect_arrays[type(game_obj)] = _RectArrays()
+        arrays.add(game_obj, bounds)
+        self._grid.add(game_obj, bounds)
+        if game_obj._clip is not None:
+            self._animation_started(game_obj)
+
     def _remove_game_object(self, game_obj):
         if not isinstance(game_obj, GameObj):
             raise Exception(
@@ -366,6 +1278,62 @@ class Stage:
                 type(game_obj) +
                 "-parameter")
         self.game_objects.remove(game_obj)
+        self._rect_arrays[type(game_obj)].remove(game_obj)
+        self._grid.remove(game_obj)
+        self._moved_game_objects.discard(game_obj)
+        self._sweep_starts.pop(game_obj, None)
+        self._timed_animations.discard(game_obj)
+        self._game_objects_changed()
+        if game_obj.static:
+            self._static_objects_changed()
+        self._redraw_game_objects.discard(game_obj)
+        rect = self._drawn_rects.pop(game_obj, None)
+        if rect is not None:
+            self._removed_rects.append(rect)
+
+    def _animation_started(self, game_obj):
+        """Called when a game object starts playing a clip."""
+        if game_obj._clip.frame_duration is not None:
+            self._timed_animations.add(game_obj)
+
+    def _animation_stopped(self, game_obj):
+        """Called when a game object stops playing a clip."""
+        self._timed_animations.discard(game_obj)
+
+    def _game_object_moved(self, game_obj):
+        """Called by a game object when its rectangle or image changed."""
+        self._moved_game_objects.add(game_obj)
+        if getattr(game_obj, "static", False):
+            self._static_objects_changed()
+        if self.use_dirty_rects:
+            self._redraw_game_objects.add(game_obj)
+
+    def _game_objects_changed(self):
+        """Called when game objects were added, removed or redefined."""
+        self._z_order = None
+        self._custom_drawers = None
+        self._marked_game_objects = None
+
+    def _start_sweep(self, game_obj):
+        """Called by a fast game object before it moves.
+
+        A sweep covers the moves of one frame: it ends with the next
+        ``update`` of the stage or when Pygame Zero's clock ticks, even
+        if the stage's ``update`` is never called.
+        """
+        now = pgzero.clock.clock.t
+        start = self._sweep_starts.get(game_obj)
+        if start is None or start[2] != now:
+            r = game_obj._rect
+            self._sweep_starts[game_obj] = (r.centerx, r.centery, now)
+
+    def _update_moved_game_objects(self):
+        """Bring the rectangle arrays and the spatial grid up to date."""
+        for game_obj in self._moved_game_objects:
+            bounds = game_obj._collision_bounds()
+            self._rect_arrays[type(game_obj)].update(game_obj, bounds)
+            self._grid.update(game_obj, bounds)
+        self._moved_game_objects.clear()
 
     def leave_all(self, cls=object):
         """Let all game objects of given class leave this stage."""
@@ -378,6 +1346,27 @@ class Stage:
         for item in objs:
             item.leave_stage()
 
+    def spawn_spaced(self, create, count, min_distance,
+                     edge=(DEFAULT_EDGE, DEFAULT_EDGE), exclude=()):
+        """Put ``count`` new game objects on this stage with spacing.
+
+        ``create`` is called with a position and must return a game
+        object, e. g. a class like ``Worm``. No two positions are closer
+        than ``min_distance``. ``edge`` works like in ``is_beyond_edge``,
+        ``exclude`` is a list of ``(pos, radius)`` tuples, e. g.
+        ``[(crab, 100)]`` (see ``poisson_disk_positions``).
+
+        Return the list of new game objects.
+        """
+        area = (edge[0], edge[1],
+                _PGZ.WIDTH - edge[0], _PGZ.HEIGHT - edge[1])
+        result = []
+        for pos in poisson_disk_positions(count, min_distance, area, exclude):
+            game_obj = create(pos)
+            game_obj.appear_on_stage(self)
+            result.append(game_obj)
+        return result
+
     def is_beyond_edge(self, pos, edge=(DEFAULT_EDGE, DEFAULT_EDGE)):
         """Check, if ``pos`` is beyond the stage's edges.
 
@@ -401,15 +1390,544 @@ class Stage:
 
     def draw(self):
         """Draw Background and dispatch ``draw`` call to all game objects."""
+        Stage._last_drawn = self
+        if self.render_scale != 1:
+            self._draw_scaled()
+            return
+        static_layer = self._static_layer()
+        if static_layer is not None:
+            _PGZ.screen.blit(static_layer, (0, 0))
+        else:
+            self._draw_background()
+        self._draw_game_objects()
+        self._draw_marker_layer()
+
+    def _draw_scaled(self):
+        """Draw the images at ``render_scale`` and enlarge them once.
+
+        The images are drawn through a camera whose zoom includes the
+        render scale, so the scaled images are cached. Overwritten
+        ``draw`` methods and markers draw onto the window afterwards.
+        """
+        window = _PGZ.screen.surface
+        width, height = window.get_size()
+        size = (max(1, round(width * self.render_scale)),
+                max(1, round(height * self.render_scale)))
+        if self._render_surface is None or \
+                self._render_surface.get_size() != size:
+            self._render_surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                self._render_surface = self._render_surface.convert()
+            self._render_camera = Camera()
+            self._scaled_background = (None, None)
+        camera = self._render_camera
+        if self.camera is None:
+            camera.left = camera.top = 0
+            camera.zoom = size[0] / width
+        else:
+            camera.left = self.camera.left
+            camera.top = self.camera.top
+            camera.zoom = self.camera.zoom * size[0] / width
+
+        # The background and the static layer don't move with the camera:
+        static_layer = self._static_layer()
+        if static_layer is not None:
+            background = static_layer
+        elif self.background_image is not None:
+            background = self._background_surface()
+        else:
+            background = None
+        if self._scaled_background[0] is not background:
+            self._scaled_background = (
+                background, None if background is None else
+                pygame.transform.smoothscale(background, size))
+
+        restore = _draw_into(self._render_surface)
+        try:
+            if background is None:
+                _PGZ.screen.fill("white")
+            else:
+                _PGZ.screen.blit(self._scaled_background[1], (0, 0))
+            if static_layer is None and self.tile_map is not None:
+                self.tile_map.draw(camera)
+            custom_drawers = self._draw_visible_game_objects(
+                camera, static_layer is not None)
+        finally:
+            restore()
+
+        if self.smooth_scaling:
+            pygame.transform.smoothscale(
+                self._render_surface, (width, height), window)
+        else:
+            pygame.transform.scale(
+                self._render_surface, (width, height), window)
+        for game_obj in custom_drawers:
+            _call_base_and_sub_op(a=game_obj, basecls=GameObj,
+                                  op_name="draw", call_base=False)
+        self._draw_marker_layer()
+
+    def _draw_background(self):
+        """Draw the background image or white, and the tile map."""
         if self.background_image is None:
             _PGZ.screen.fill("white")
         else:
-            _PGZ.screen.blit(self.background_image, (0, 0))  # background image
-        self._call_all_gameobj_and_sub_op("draw")
+            _PGZ.screen.blit(self._background_surface(), (0, 0))
+        if self.tile_map is not None:
+            self.tile_map.draw(self.camera)
+
+    def _static_layer(self):
+        """Return background, tile map and static game objects in one image.
+
+        The image is drawn again only when a ``static`` game object
+        appeared, left or changed, or when the background or the tile
+        map changed. If there are no static game objects or if the
+        stage has a camera, return ``None``.
+        """
+        if self.camera is not None:
+            return None
+        tile_map = self.tile_map
+        size = _PGZ.screen.surface.get_size()
+        key = (self.background_image, tile_map,
+               None if tile_map is None else tile_map._surface, size)
+        if self._static_layer_key != key:
+            self._static_layer_surface = None
+        if self._static_layer_surface is None:
+            static_objects = [game_obj for game_obj in self.game_objects
+                              if game_obj.static]
+            self._static_layer_key = key
+            if not static_objects:
+                # Remember that there is nothing to prerender:
+                self._static_layer_surface = False
+                return None
+            surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            restore = _draw_into(surface)
+            try:
+                self._draw_background()
+                for game_obj in static_objects:
+                    _call_base_and_sub_op(a=game_obj, basecls=GameObj,
+                                          op_name="draw")
+            finally:
+                restore()
+            self._static_layer_surface = surface
+            # Drawing the tile map may have rendered its image:
+            self._static_layer_key = (
+                self.background_image, tile_map,
+                None if tile_map is None else tile_map._surface, size)
+        return self._static_layer_surface or None
+
+    def _static_objects_changed(self):
+        """Called when a static game object appeared, left or changed."""
+        self._static_layer_surface = None
+
+    def _background_surface(self):
+        """Return the background image, converted for fast blits.
+
+        The image name is resolved only once per background image.
+        """
+        name = self.background_image
+        if self._background[0] != name:
+            self._background = (
+                name, convert_for_display(loaders.images.load(name), True))
+        return self._background[1]
+
+    def _draw_dirty_rects(self):
+        """Draw the current frame in dirty rectangle mode.
+
+        This replaces the usual ``draw`` dispatch (see ``use_dirty_rects``).
+        """
+        screen = _PGZ.screen.surface
+        static_layer = self._static_layer()
+        background = (self.background_image, self.tile_map, static_layer)
+        full = Stage._last_drawn is not self or \
+            self._drawn_background != background or \
+            (self.tile_map is not None and self.tile_map._surface is None)
+        Stage._last_drawn = self
+        self._drawn_background = background
+
+        # Overwritten draw methods and markers draw onto the transparent
+        # overlay:
+        custom_drawers = self._get_custom_drawers()
+        stage_draws = _has_sub_op(self, Stage, "draw")
+        markers = self.show_markers and self._get_marked_game_objects()
+        overlay_rect = None
+        if custom_drawers or stage_draws or markers or \
+                self._overlay_rect is not None:
+            if self._overlay is None or \
+                    self._overlay.get_size() != screen.get_size():
+                self._overlay = pygame.Surface(screen.get_size(),
+                                               pygame.SRCALPHA)
+                self._overlay_rect = None
+                full = True
+            if self._overlay_rect is not None:
+                self._overlay.fill((0, 0, 0, 0), self._overlay_rect)
+            restore = _draw_into(self._overlay)
+            try:
+                for game_obj in custom_drawers:
+                    _call_base_and_sub_op(a=game_obj, basecls=GameObj,
+                                          op_name="draw", call_base=False)
+                drawn = self._draw_all_markers()
+                if stage_draws:
+                    _call_base_and_sub_op(a=self, basecls=Stage,
+                                          op_name="draw", call_base=False)
+            finally:
+                restore()
+            if custom_drawers or stage_draws:
+                # We don't know where they drew, so search the overlay:
+                overlay_rect = _alpha_bounding_rect(self._overlay)
+            elif drawn:
+                overlay_rect = drawn[0].unionall(drawn[1:]).clip(
+                    self._overlay.get_rect())
+            if not overlay_rect:
+                overlay_rect = None
+
+        if full:
+            rects = [screen.get_rect()]
+            self._drawn_rects.clear()
+            self._redraw_game_objects.update(self.game_objects)
+        else:
+            rects = self._removed_rects
+            if self._overlay_rect is not None:
+                rects.append(self._overlay_rect)
+            if overlay_rect is not None:
+                rects.append(overlay_rect)
+        for game_obj in self._redraw_game_objects:
+            old_rect = self._drawn_rects.get(game_obj)
+            if old_rect is not None:
+                rects.append(old_rect)
+            r = game_obj._rect
+            new_rect = pygame.Rect(r.x, r.y, r.w, r.h).inflate(2, 2)
+            self._drawn_rects[game_obj] = new_rect
+            rects.append(new_rect)
+        self._redraw_game_objects.clear()
+        self._removed_rects = []
+        self._overlay_rect = overlay_rect
+        self.dirty_rects = _merge_rects([rect for rect in rects if rect])
+
+        for rect in self.dirty_rects:
+            self._redraw_area(screen, rect)
+
+    def _redraw_area(self, screen, rect):
+        """Helper: draw everything within ``rect``."""
+        self._update_moved_game_objects()
+        screen.set_clip(rect)
+        static_layer = self._static_layer()
+        if static_layer is not None:
+            screen.blit(static_layer, rect, rect)
+        elif self.background_image is None:
+            screen.fill((255, 255, 255), rect)
+        else:
+            screen.blit(self._background_surface(), rect, rect)
+        if static_layer is None and self.tile_map is not None:
+            self.tile_map.draw()
+        if self._z_order is None:
+            self._z_order = {game_obj: i
+                             for i, game_obj in enumerate(self.game_objects)}
+        game_objs = sorted(
+            self._grid.query((rect.left, rect.top, rect.right, rect.bottom)),
+            key=self._z_order.__getitem__)
+        for game_obj in game_objs:
+            if not game_obj.static:
+                screen.blit(game_obj._surf, game_obj.topleft)
+        if self._overlay_rect is not None and \
+                rect.colliderect(self._overlay_rect):
+            screen.blit(self._overlay, rect, rect)
+        screen.set_clip(None)
+
+    def _get_custom_drawers(self):
+        """Return the game objects that overwrite ``draw``.
+
+        The result is a dict (used as an ordered set), so it keeps the
+        drawing order and allows fast membership tests. Static game
+        objects are not included, since they are part of the static
+        layer.
+        """
+        if self._custom_drawers is None:
+            self._custom_drawers = dict.fromkeys(
+                game_obj for game_obj in self.game_objects
+                if not game_obj.static and
+                _has_sub_op(game_obj, GameObj, "draw"))
+        return self._custom_drawers
+
+    def _get_marked_game_objects(self):
+        """Return the game objects that have at least one marker color."""
+        if self._marked_game_objects is None:
+            self._marked_game_objects = [
+                game_obj for game_obj in self.game_objects
+                if game_obj._has_markers()]
+        return self._marked_game_objects
+
+    def _draw_all_markers(self):
+        """Draw the markers of all game objects, return the drawn rects."""
+        drawn = []
+        if self.show_markers:
+            for game_obj in self._get_marked_game_objects():
+                if game_obj.stage is self and game_obj.show_markers:
+                    drawn.extend(game_obj._draw_markers())
+        return drawn
+
+    def _draw_marker_layer(self):
+        """Draw all markers onto a transparent layer and blit it once.
+
+        The layer is kept between frames; only the area drawn in the
+        previous frame is cleared.
+        """
+        if self._marker_rect is None and \
+                not (self.show_markers and self._get_marked_game_objects()):
+            return
+        screen = pgzero.game.screen
+        if self._marker_surface is None or \
+                self._marker_surface.get_size() != screen.get_size():
+            self._marker_surface = pygame.Surface(
+                screen.get_size(), pygame.SRCALPHA)
+            self._marker_rect = None
+        if self._marker_rect is not None:
+            self._marker_surface.fill((0, 0, 0, 0), self._marker_rect)
+        restore = _draw_into(self._marker_surface)
+        try:
+            drawn = self._draw_all_markers()
+        finally:
+            restore()
+        if drawn:
+            self._marker_rect = drawn[0].unionall(drawn[1:]).clip(
+                self._marker_surface.get_rect())
+            screen.blit(self._marker_surface, self._marker_rect,
+                        self._marker_rect)
+        else:
+            self._marker_rect = None
+
+    def _draw_game_objects(self):
+        """Draw all game objects with as few ``blits`` calls as possible.
+
+        Game objects using the base ``draw`` are collected as
+        (surface, position) pairs and handed to a single
+        ``Surface.blits`` call.  Only when a game object overwrites
+        ``draw`` or draws markers, the pending batch is flushed, so
+        the drawing order stays the same as with one ``draw`` call per
+        game object. Static game objects are skipped, since they are
+        drawn with the static layer.
+
+        With a fixed time step, the images are drawn between their
+        last two states (see ``tick_rate``).
+        """
+        if self.camera is not None:
+            self._draw_visible_game_objects()
+            return
+        blits = pgzero.game.screen.blits
+        custom_drawers = self._get_custom_drawers()
+        interpolate = self.tick_rate is not None and self._previous_states
+        if not custom_drawers and not interpolate:
+            blits([(game_obj._surf, game_obj._rect.topleft)
+                   for game_obj in self.game_objects
+                   if game_obj.stage is self and not game_obj.static],
+                  doreturn=False)
+            return
+        batch = []
+        for game_obj in list(self.game_objects):
+            if game_obj.stage is not self or game_obj.static:
+                continue
+            if interpolate:
+                surf, x, y = self._interpolated(game_obj)
+                batch.append((surf, (x, y)))
+            else:
+                batch.append((game_obj._surf, game_obj._rect.topleft))
+            if game_obj in custom_drawers:
+                blits(batch, doreturn=False)
+                batch = []
+                _call_base_and_sub_op(a=game_obj, basecls=GameObj,
+                                      op_name="draw", call_base=False)
+        blits(batch, doreturn=False)
+
+    def _draw_visible_game_objects(self, camera=None, skip_static=None):
+        """Draw the game objects that the camera shows.
+
+        The candidates come from the spatial grid and are drawn in the
+        order of ``game_objects`` with batched ``blits`` calls.
+
+        If a ``camera`` other than the stage's camera is given, draw
+        only the images and return the visible game objects with an
+        overwritten ``draw`` method, so they can draw later. If
+        ``skip_static`` is true, static game objects are not drawn.
+        """
+        draw_custom = camera is None
+        if camera is None:
+            camera = self.camera
+        deferred = []
+        screen = pgzero.game.screen
+        blits = screen.blits
+        self._update_moved_game_objects()
+        left, top, right, bottom = camera.viewport(screen.get_size())
+        if self._z_order is None:
+            self._z_order = {game_obj: i
+                             for i, game_obj in enumerate(self.game_objects)}
+        visible = sorted(self._grid.query((left, top, right, bottom)),
+                         key=self._z_order.__getitem__)
+        custom_drawers = self._get_custom_drawers()
+        interpolate = self.tick_rate is not None and self._previous_states
+        zoom = camera.zoom
+        batch = []
+        for game_obj in visible:
+            r = game_obj._rect
+            if r.right <= left or r.x >= right or \
+                    r.bottom <= top or r.y >= bottom:
+                continue
+            if skip_static and game_obj.static:
+                continue
+            if interpolate:
+                surf, x, y = self._interpolated(game_obj)
+            else:
+                surf, x, y = game_obj._surf, r.x, r.y
+            if zoom == 1:
+                batch.append((surf, (round(x - left), round(y - top))))
+            else:
+                batch.append((camera._scale(surf),
+                              (round((x - left) * zoom),
+                               round((y - top) * zoom))))
+            if game_obj in custom_drawers or game_obj.static and \
+                    _has_sub_op(game_obj, GameObj, "draw"):
+                if not draw_custom:
+                    deferred.append(game_obj)
+                    continue
+                blits(batch, doreturn=False)
+                batch = []
+                _call_base_and_sub_op(a=game_obj, basecls=GameObj,
+                                      op_name="draw", call_base=False)
+        blits(batch, doreturn=False)
+        return deferred
+
+    def _interpolated(self, game_obj):
+        """Return image and top left corner between the last two states."""
+        r = game_obj._rect
+        previous = self._previous_states.get(game_obj)
+        if previous is None:
+            return game_obj._surf, r.x, r.y
+        alpha = self._alpha
+        ax, ay = game_obj._anchor
+        x0, y0, angle0 = previous
+        x = x0 + (r.x + ax - x0) * alpha
+        y = y0 + (r.y + ay - y0) * alpha
+        angle = game_obj._angle
+        if angle == angle0:
+            return game_obj._surf, x - ax, y - ay
+        angle = angle0 + ((angle - angle0 + 180) % 360 - 180) * alpha
+        surf = rotation_cache.get(game_obj._orig_surf, angle)
+        w, h = game_obj._orig_surf.get_size()
+        ax, ay = transform_anchor(*game_obj._untransformed_anchor, w, h,
+                                  rotation_cache.quantize(angle))
+        return surf, x - ax, y - ay
+
+    def _advance(self, dt):
+        """Update the stage with a fixed time step (see ``tick_rate``)."""
+        step = self._dt = 1 / self.tick_rate
+        self._accumulator += dt
+        ticks = min(int(self._accumulator / step), self.max_ticks_per_frame)
+        for tick in range(ticks):
+            if tick == ticks - 1:
+                self._previous_states = {
+                    game_obj: (game_obj._rect.x + game_obj._anchor[0],
+                               game_obj._rect.y + game_obj._anchor[1],
+                               game_obj._angle)
+                    for game_obj in self.game_objects}
+            _call_base_and_sub_op(a=self, basecls=Stage, op_name="update")
+        self._accumulator -= ticks * step
+        if self._accumulator >= step:
+            # We can't catch up, so we drop the remaining time:
+            self._accumulator %= step
+        self._alpha = self._accumulator / step
 
     def update(self):
-        """Dispatch ``act`` call to all game objects."""
+        """Dispatch ``act`` call to all game objects.
+
+        Each update starts new sweeps for fast game objects
+        (see ``GameObj.move``) and advances the animation clips
+        that have a ``frame_duration``.
+        """
+        self._sweep_starts.clear()
         self._call_all_gameobj_and_sub_op("act")
+        for game_obj in list(self._timed_animations):
+            game_obj._advance_clip(self._dt)
+        if self.resolve_iterations > 0:
+            self.resolve_collisions(self.resolve_iterations)
+
+    def resolve_collisions(self, iterations=1):
+        """Push overlapping ``solid`` game objects apart.
+
+        In each iteration every overlapping pair of solid game objects
+        found with the spatial grid is moved apart along the shortest
+        separating vector. Each object moves half the way, unless one of
+        them is not ``movable``. A few iterations usually resolve chains
+        of pushed objects.
+
+        The collision shape and its bounds are computed once per game
+        object (again only after a push), so that pairs whose bounds do
+        not touch are skipped cheaply. After the first iteration, only
+        pairs with a game object pushed in the iteration before are
+        checked, since all other pairs did not change.
+        """
+        solids = {}  # solid game object -> index
+        for game_obj in self.game_objects:
+            if game_obj.solid:
+                solids[game_obj] = len(solids)
+        shapes = {}  # game object -> (collision geometry, its bounds)
+
+        def shape_of(game_obj):
+            shape = shapes.get(game_obj)
+            if shape is None:
+                geometry = game_obj._collision_geometry()
+                shape = shapes[game_obj] = (geometry, _shape_bounds(geometry))
+            return shape
+
+        candidates = solids
+        for dummy in range(iterations):
+            self._update_moved_game_objects()
+            pushed = {}  # used as ordered set
+            for a in candidates:
+                index = solids[a]
+                geometry, a_bounds = shape_of(a)
+                for b in self._grid.query(a_bounds):
+                    other_index = solids.get(b)
+                    # consider each pair only once:
+                    if other_index is None or b is a or \
+                            other_index < index and b in candidates:
+                        continue
+                    other_geometry, b_bounds = shape_of(b)
+                    if b_bounds[0] >= a_bounds[2] or \
+                            b_bounds[2] <= a_bounds[0] or \
+                            b_bounds[1] >= a_bounds[3] or \
+                            b_bounds[3] <= a_bounds[1]:
+                        continue
+                    if a.movable and b.movable:
+                        share_a = share_b = 0.5
+                    elif a.movable or b.movable:
+                        share_a = 1 if a.movable else 0
+                        share_b = 1 - share_a
+                    else:
+                        continue
+                    if not self.layers_collide(a.collision_layer,
+                                               b.collision_layer):
+                        continue
+                    if a.collision_shape == "mask" and \
+                            b.collision_shape == "mask":
+                        push = a._separation(b)
+                    else:
+                        push = _shapes_separation(geometry, other_geometry)
+                    if push is None:
+                        continue
+                    if share_a:
+                        a.pos = (a.x + push[0] * share_a,
+                                 a.y + push[1] * share_a)
+                        del shapes[a]
+                        geometry, a_bounds = shape_of(a)
+                        pushed[a] = None
+                    if share_b:
+                        b.pos = (b.x - push[0] * share_b,
+                                 b.y - push[1] * share_b)
+                        del shapes[b]
+                        pushed[b] = None
+            if not pushed:
+                break
+            candidates = pushed
 
     def on_mouse_down(self, pos, button):
         """Dispatch ``on_mouse_down`` call to all game objects."""
@@ -436,6 +1954,28 @@ class Stage:
             "on_key_down", key=key, mod=mod, unicode=unicode)
 
 
+def _has_sub_op(a, basecls, op_name):
+    """Check if ``a`` overwrites ``op_name``, see ``_call_base_and_sub_op``."""
+    if type(a) is basecls:
+        return callable(vars(a).get(op_name))
+    return op_name in type(a).__dict__
+
+
+def _draw_into(surface):
+    """Redirect all drawing to ``surface``.
+
+    This affects ``screen`` of Pygame Zero and ``Actor.draw``. Return
+    a function that restores the previous drawing target.
+    """
+    screen = _PGZ.screen
+    previous = (screen.surface, pgzero.game.screen)
+    screen.surface = pgzero.game.screen = surface
+
+    def restore():
+        screen.surface, pgzero.game.screen = previous
+    return restore
+
+
 def _call_current_stage_and_sub_op(op_name, **kwargs):
     """Helper."""
     if Stage.current is not None:
@@ -452,17 +1992,62 @@ def _call_current_stage_and_sub_op(op_name, **kwargs):
 
 
 def draw():
-    """Pygame Zero global hook method."""
-    _call_current_stage_and_sub_op("draw")
+    """Pygame Zero global hook method.
 
+    Frames captured while drawing (see ``FrameExporter.capture``) are
+    copied from the screen when the frame is complete.
+    """
+    outer = Stage._frame_captures is None
+    if outer:
+        Stage._frame_captures = []
+    try:
+        if Stage.current is not None and Stage.current.use_dirty_rects and \
+                Stage.current.camera is None and \
+                Stage.current.render_scale == 1:
+            Stage.current._draw_dirty_rects()
+        else:
+            _call_current_stage_and_sub_op("draw")
+    finally:
+        captures = Stage._frame_captures
+        if outer:
+            Stage._frame_captures = None
+    for exporter, slot, index in captures if outer else ():
+        exporter._copy_frame(slot, index, pgzero.game.screen)
 
-def update():
-    """Pygame Zero global hook method."""
-    _call_current_stage_and_sub_op("update")
+
+def update(dt):
+    """Pygame Zero global hook method.
+
+    ``dt`` is the time in seconds since the last frame. It is used only
+    by stages with a ``tick_rate``.
+    """
+    if Stage.current is not None and Stage.current.tick_rate is not None:
+        Stage.current._advance(dt)
+    else:
+        if Stage.current is not None:
+            Stage.current._dt = dt
+        _call_current_stage_and_sub_op("update")
+
+
+def _to_stage_coordinates(pos, rel=None):
+    """Convert a mouse position (and movement) from the screen to the stage.
+
+    Return the position, or a tuple of position and movement if ``rel``
+    is given.
+    """
+    camera = Stage.current.camera if Stage.current is not None else None
+    if camera is not None:
+        pos = camera.screen_to_world(pos)
+        if rel is not None:
+            rel = (rel[0] / camera.zoom, rel[1] / camera.zoom)
+    if rel is None:
+        return pos
+    return pos, rel
 
 
 def on_mouse_down(pos, button):
     """Pygame Zero global hook method."""
+    pos = _to_stage_coordinates(pos)
     mouse_state._press(button)
     mouse_state._set_pos(pos)
     _call_current_stage_and_sub_op("on_mouse_down", pos=pos, button=button)
@@ -470,6 +2055,7 @@ def on_mouse_down(pos, button):
 
 def on_mouse_up(pos, button):
     """Pygame Zero global hook method."""
+    pos = _to_stage_coordinates(pos)
     mouse_state._release(button)
     mouse_state._set_pos(pos)
     _call_current_stage_and_sub_op("on_mouse_up", pos=pos, button=button)
@@ -477,6 +2063,7 @@ def on_mouse_up(pos, button):
 
 def on_mouse_move(pos, rel, buttons):
     """Pygame Zero global hook method."""
+    pos, rel = _to_stage_coordinates(pos, rel)
     mouse_state._set_pos(pos)
     _call_current_stage_and_sub_op(
         "on_mouse_move", pos=pos, rel=rel, buttons=buttons)
@@ -493,6 +2080,755 @@ def on_key_down(key, mod, unicode):
         "on_key_down", key=key, mod=mod, unicode=unicode)
 
 
+class MaskBank:
+    """A cache of collision masks per image and rotation angle.
+
+    Game objects that turn constantly would need a new mask nearly every
+    frame. The bank therefore rounds the angle to a multiple of
+    ``angle_step`` degrees and computes each (image, angle) mask
+    only once. If more than ``max_masks`` masks are stored, the least
+    recently used mask is dropped.
+
+    For large images the bank also provides mask pyramids, i. e.
+    coarse masks for early rejection (see ``get_pyramid``).
+    """
+
+    PYRAMID_FACTORS = (16, 4)
+    """Downsampling factors of pyramid levels, coarsest first."""
+
+    def __init__(self, angle_step=5, max_masks=2000):
+        self.angle_step = angle_step
+        self.max_masks = max_masks
+        self._masks = collections.OrderedDict()
+        self._pyramids = collections.OrderedDict()
+
+    def quantize(self, angle):
+        """Round ``angle`` to the angular resolution of this bank."""
+        return round(angle / self.angle_step) * self.angle_step % 360
+
+    def _lookup(self, cache, key, build):
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build()
+            if len(cache) > self.max_masks:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return value
+
+    def get(self, surface, angle=0):
+        """Return the mask of ``surface`` rotated by ``angle`` degrees."""
+        def build():
+            if key[1] != 0:
+                return pygame.mask.from_surface(
+                    pygame.transform.rotate(surface, key[1]))
+            return pygame.mask.from_surface(surface)
+        key = (surface, self.quantize(angle))
+        return self._lookup(self._masks, key, build)
+
+    def get_pyramid(self, surface, angle=0):
+        """Return coarse versions of the mask ``get`` would return.
+
+        The result is a list of ``(factor, coarse, dilated)`` tuples,
+        one for each of ``PYRAMID_FACTORS``. A bit of ``coarse`` is set
+        if any bit of the ``factor`` x ``factor`` block of the full mask
+        is set. ``dilated`` additionally sets the right and bottom
+        neighbours of each bit of ``coarse``.
+        """
+        def build():
+            return [self._downsample(mask, factor)
+                    for factor in self.PYRAMID_FACTORS]
+        mask = self.get(surface, angle)
+        key = (surface, self.quantize(angle))
+        return self._lookup(self._pyramids, key, build)
+
+    @staticmethod
+    def _downsample(mask, factor):
+        w, h = mask.get_size()
+        cw = -(-w // factor)
+        ch = -(-h // factor)
+        bits = numpy.zeros((cw * factor, ch * factor), dtype=bool)
+        bits[:w, :h] = pygame.surfarray.array_red(mask.to_surface()) > 0
+        coarse = bits.reshape(cw, factor, ch, factor).any(axis=(1, 3))
+        dilated = numpy.zeros((cw + 1, ch + 1), dtype=bool)
+        dilated[:-1, :-1] |= coarse
+        dilated[1:, :-1] |= coarse
+        dilated[:-1, 1:] |= coarse
+        dilated[1:, 1:] |= coarse
+        return (factor,
+                MaskBank._mask_from_array(coarse),
+                MaskBank._mask_from_array(dilated))
+
+    @staticmethod
+    def _mask_from_array(bits):
+        surface = pygame.Surface(bits.shape, pygame.SRCALPHA)
+        pygame.surfarray.pixels_alpha(surface)[:] = bits * 255
+        return pygame.mask.from_surface(surface)
+
+    def clear(self):
+        """Drop all masks."""
+        self._masks.clear()
+        self._pyramids.clear()
+
+
+mask_bank = MaskBank()
+"""The mask bank used by all game objects."""
+
+
+class RotationCache:
+    """A cache of rotated images per image and rotation angle.
+
+    Setting ``Actor.angle`` rotates the original image each time.
+    This cache rounds the angle to a multiple of ``angle_step`` degrees
+    and rotates each image only once per rounded angle. If the rotated
+    images take more than ``max_bytes`` of memory, the least recently
+    used images are dropped.
+    """
+
+    def __init__(self, angle_step=1, max_bytes=32 * 1024 * 1024):
+        self.angle_step = angle_step
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._surfaces = collections.OrderedDict()
+
+    def quantize(self, angle):
+        """Round ``angle`` to the angular resolution of this cache."""
+        return round(angle / self.angle_step) * self.angle_step % 360
+
+    def get(self, surface, angle):
+        """Return ``surface`` rotated by ``angle`` degrees."""
+        angle = self.quantize(angle)
+        if angle == 0:
+            return surface
+        key = (surface, angle)
+        rotated = self._surfaces.get(key)
+        if rotated is None:
+            rotated = self._surfaces[key] = pygame.transform.rotate(
+                surface, angle)
+            self._bytes += self._size_of(rotated)
+            while self._bytes > self.max_bytes and len(self._surfaces) > 1:
+                dummy, dropped = self._surfaces.popitem(last=False)
+                self._bytes -= self._size_of(dropped)
+        else:
+            self._surfaces.move_to_end(key)
+        return rotated
+
+    @staticmethod
+    def _size_of(surface):
+        w, h = surface.get_size()
+        return w * h * surface.get_bytesize()
+
+    def clear(self):
+        """Drop all rotated images."""
+        self._surfaces.clear()
+        self._bytes = 0
+
+
+rotation_cache = RotationCache()
+"""The rotation cache used by all game objects."""
+
+
+_KEY_COLORS = ((255, 0, 255), (0, 255, 1), (1, 2, 3))
+"""Candidates for a colorkey that must not occur in an image."""
+
+_converted_surfaces = {}  # (surface, opaque) -> converted surface
+
+
+def convert_for_display(surface, opaque=False):
+    """Return ``surface`` in the pixel format of the display.
+
+    Blits of converted surfaces take pygame's fast path. The result
+    depends on the measured alpha values of the surface:
+
+    * a surface without transparency is converted with ``convert()``,
+      if ``opaque`` is ``True``, e. g. for background images,
+    * a surface whose pixels are either fully transparent or fully
+      opaque gets a colorkey with run-length encoding,
+    * other surfaces are converted with ``convert_alpha()``.
+
+    Converted surfaces are cached. Before the display has been
+    initialized, the surface is returned unchanged.
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    key = (surface, opaque)
+    result = _converted_surfaces.get(key)
+    if result is not None:
+        return result
+    if not surface.get_flags() & pygame.SRCALPHA:
+        alpha = None
+    else:
+        alpha = pygame.surfarray.array_alpha(surface)
+    if alpha is None or alpha.min() == 255:
+        if opaque:
+            result = surface.convert()
+        else:
+            # A sprite without transparency still needs transparent
+            # corners when it is rotated:
+            alpha = numpy.full(surface.get_size(), 255, dtype=numpy.uint8)
+    if result is None and ((alpha == 0) | (alpha == 255)).all():
+        rgb = pygame.surfarray.array3d(surface)
+        visible = rgb[alpha == 255]
+        for color in _KEY_COLORS:
+            if not (visible == color).all(axis=1).any():
+                result = surface.convert()
+                rgb[alpha == 0] = color
+                pygame.surfarray.blit_array(result, rgb)
+                result.set_colorkey(color, pygame.RLEACCEL)
+                break
+    if result is None:
+        result = surface.convert_alpha()
+    _converted_surfaces[key] = result
+    return result
+
+
+class Atlas:
+    """Many small images packed into a few big surfaces.
+
+    Each image of the atlas is a subsurface of one of the big ``pages``,
+    i. e. a view without a copy of its own. Images are packed row by
+    row ("shelf packing") after sorting them by height. Images larger
+    than ``max_image_size`` are not packed.
+
+    After calling ``use()``, setting ``GameObj.image`` to the name
+    of an image of the atlas takes the image from the atlas instead of
+    loading a separate file.
+    """
+
+    current = None
+    """The atlas in use or ``None``."""
+
+    def __init__(self, images, page_size=1024, max_image_size=256, padding=1):
+        """Pack ``images``, a dictionary of names and surfaces.
+
+        ``max_image_size`` must not be larger than ``page_size``.
+        """
+        if max_image_size > page_size:
+            raise ValueError(
+                "max_image_size must not be larger than page_size, got "
+                "%r > %r" % (max_image_size, page_size))
+        self.pages = []
+        self.frames = {}  # name -> (page index, rect)
+        self._surfaces = {}  # name -> subsurface
+        packable = sorted(
+            ((name, surface) for name, surface in images.items()
+             if max(surface.get_size()) <= max_image_size),
+            key=lambda item: -item[1].get_height())
+        page = []  # (name, surface, position) of the current page
+        x = y = shelf_height = 0
+        for name, surface in packable:
+            w, h = surface.get_size()
+            if x + w > page_size:
+                # next shelf:
+                x = 0
+                y += shelf_height + padding
+                shelf_height = 0
+            if y + h > page_size:
+                self._add_page(page)
+                page = []
+                x = y = shelf_height = 0
+            page.append((name, surface, (x, y)))
+            x += w + padding
+            shelf_height = max(shelf_height, h)
+        if page:
+            self._add_page(page)
+        self._make_subsurfaces()
+
+    def _add_page(self, page):
+        width = max(pos[0] + surface.get_width()
+                    for dummy, surface, pos in page)
+        height = max(pos[1] + surface.get_height()
+                     for dummy, surface, pos in page)
+        big = pygame.Surface((width, height), pygame.SRCALPHA)
+        for name, surface, pos in page:
+            big.blit(surface, pos)
+            self.frames[name] = (
+                len(self.pages), pygame.Rect(pos, surface.get_size()))
+        self.pages.append(big)
+
+    def _make_subsurfaces(self):
+        self._surfaces = {
+            name: self.pages[page].subsurface(rect)
+            for name, (page, rect) in self.frames.items()}
+
+    @classmethod
+    def from_directory(cls, directory=None, **kwargs):
+        """Pack all images of a directory, by default of ``images``."""
+        if directory is None:
+            directory = loaders.images._root()
+        images = {}
+        for filename in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(filename)
+            if ext[1:].lower() in loaders.ImageLoader.EXTNS:
+                images[name] = pygame.image.load(
+                    os.path.join(directory, filename))
+        return cls(images, **kwargs)
+
+    def save(self, path):
+        """Save the atlas ahead of time as ``path.json`` and PNG pages."""
+        for i, page in enumerate(self.pages):
+            pygame.image.save(page, "%s_%d.png" % (path, i))
+        with open(path + ".json", "w") as f:
+            json.dump({name: [page, list(rect)]
+                       for name, (page, rect) in self.frames.items()}, f)
+
+    @classmethod
+    def load(cls, path):
+        """Load an atlas that has been saved with ``save``."""
+        result = cls({})
+        with open(path + ".json") as f:
+            frames = json.load(f)
+        result.frames = {name: (page, pygame.Rect(rect))
+                         for name, (page, rect) in frames.items()}
+        page_count = max((page for page, dummy in result.frames.values()),
+                         default=-1) + 1
+        result.pages = [pygame.image.load("%s_%d.png" % (path, i))
+                        for i in range(page_count)]
+        result._make_subsurfaces()
+        return result
+
+    def use(self):
+        """Make this atlas the current atlas.
+
+        If the display has been initialized, the pages are converted
+        to the display format first.
+        """
+        if pygame.display.get_surface() is not None:
+            self.pages = [page.convert_alpha() for page in self.pages]
+            self._make_subsurfaces()
+        Atlas.current = self
+
+    @staticmethod
+    def _name_of(image):
+        name, ext = os.path.splitext(image)
+        if ext[1:].lower() in loaders.ImageLoader.EXTNS:
+            return name
+        return image
+
+    def __contains__(self, image):
+        return self._name_of(image) in self._surfaces
+
+    def get(self, image):
+        """Return the subsurface of an image name like ``"crab3"``."""
+        return self._surfaces[self._name_of(image)]
+
+
+def _load_image(name):
+    """Return the surface of an image name, ready for fast blits.
+
+    If the image is part of the current ``Atlas``, it is taken from
+    there. Otherwise it is loaded and converted with
+    ``convert_for_display``.
+    """
+    if Atlas.current is not None and name in Atlas.current:
+        return Atlas.current.get(name)
+    return convert_for_display(loaders.images.load(name))
+
+
+class AnimationClip:
+    """A sequence of images that game objects show one after another.
+
+    The images are given by name and resolved to surfaces when the clip
+    is played for the first time, so a frame flip is just the change of
+    an index. A clip advances either every ``frame_duration`` seconds
+    or every ``frame_distance`` pixels that the game object moves.
+    Without ``loop``, the clip stops at its last frame.
+
+    If ``prerotate`` is ``True``, the clip rotates each frame for all
+    angles of ``rotation_cache`` in advance. This takes memory, but
+    turning a game object then never rotates an image.
+
+    Many game objects may share a clip, e. g.::
+
+        class Worm(GameObj):
+            CRAWL = AnimationClip.from_prefix("worm", 2, frame_distance=3)
+
+            def __init__(self, pos):
+                self.play(Worm.CRAWL)
+                self.pos = pos
+    """
+
+    def __init__(self, images, frame_duration=None, frame_distance=None,
+                 loop=True, prerotate=False):
+        if (frame_duration is None) == (frame_distance is None):
+            raise ValueError(
+                "Give either frame_duration or frame_distance")
+        self.images = list(images)
+        self.frame_duration = frame_duration
+        self.frame_distance = frame_distance
+        self.loop = loop
+        self.prerotate = prerotate
+        self._frames = None     # surfaces
+        self._rotations = None  # per frame: quantized angle -> surface
+        self._anchors = {}  # (frame, anchor, angle) -> anchor positions
+
+    @classmethod
+    def from_prefix(cls, prefix, count, **kwargs):
+        """Create a clip of the images ``prefix + "0"`` and so on."""
+        return cls([prefix + str(i) for i in range(count)], **kwargs)
+
+    def __len__(self):
+        return len(self.images)
+
+    def _resolve(self):
+        """Load the frames and, if wanted, rotate them."""
+        if self._frames is not None:
+            return
+        self._frames = [_load_image(name) for name in self.images]
+        if self.prerotate:
+            step = rotation_cache.angle_step
+            angles = {rotation_cache.quantize(i * step)
+                      for i in range(math.ceil(360 / step))}
+            self._rotations = [
+                {angle: pygame.transform.rotate(frame, angle)
+                 if angle != 0 else frame for angle in angles}
+                for frame in self._frames]
+
+
+_TRACKED_ATTRIBUTES = frozenset(
+    Actor.DELEGATED_ATTRIBUTES +
+    ["collision_shape", "collision_radius", "collision_layer"])
+"""Attribute names whose changes a game object reports to its stage.
+
+These are the attributes that ``Actor`` delegates to its rectangle
+and the attributes that define the collision shape.
+"""
+
+_DRAWING_ATTRIBUTES = frozenset(
+    ["draw", "center_drawing_color", "rect_drawing_color",
+     "pos_drawing_color", "static"])
+"""Attribute names that change how a game object draws itself."""
+
+COLLISION_SHAPES = ("mask", "circle", "box", "obb")
+"""Valid values of a game object's ``collision_shape`` attribute."""
+
+
+class TextRenderer:
+    """Draw strings composed from cached glyph surfaces.
+
+    ``screen.draw.text`` looks up the font and lays out and renders
+    the whole string on each call. This renderer renders each
+    character only once per font, font size, and color, and draws a
+    string with a single ``blits`` call. The layouts of the
+    ``max_layouts`` most recently drawn strings are cached, too.
+    Kerning between characters is ignored.
+    """
+
+    def __init__(self, max_layouts=256):
+        self.max_layouts = max_layouts
+        self._fonts = {}  # (fontname, fontsize, color) -> glyph set
+        self._layouts = collections.OrderedDict()
+
+    def _glyph_set(self, fontname, fontsize, color):
+        """Return a dict of glyphs and the line height of a font."""
+        if isinstance(color, list):
+            color = tuple(color)
+        key = (fontname, fontsize, color)
+        glyph_set = self._fonts.get(key)
+        if glyph_set is None:
+            font = ptext.getfont(fontname, fontsize)
+            glyph_set = self._fonts[key] = (
+                font, tuple(pygame.Color(color or ptext.DEFAULT_COLOR)),
+                {}, font.get_linesize())
+        return glyph_set
+
+    def get_glyph(self, char, fontname=None, fontsize=None, color=None):
+        """Return the cached surface of a single character."""
+        font, rgb, glyphs, line_height = self._glyph_set(
+            fontname, fontsize, color)
+        glyph = glyphs.get(char)
+        if glyph is None:
+            glyph = font.render(char, True, rgb)
+            if pygame.display.get_surface() is not None:
+                glyph = glyph.convert_alpha()
+            glyphs[char] = glyph
+        return glyph
+
+    def layout(self, text, fontname=None, fontsize=None, color=None):
+        """Lay out ``text`` relative to its top left corner.
+
+        Return a list of (glyph, offset) pairs and the size of the
+        text. Lines are separated by ``"\\n"``.
+        """
+        font, rgb, glyphs, line_height = self._glyph_set(
+            fontname, fontsize, color)
+        result = []
+        width = 0
+        y = 0
+        for line in text.split("\n"):
+            x = 0
+            for char in line:
+                glyph = glyphs.get(char)
+                if glyph is None:
+                    glyph = self.get_glyph(char, fontname, fontsize, color)
+                result.append((glyph, (x, y)))
+                x += glyph.get_width()
+            width = max(width, x)
+            y += line_height
+        return result, (width, y)
+
+    def draw(self, text, fontname=None, fontsize=None, color=None,
+             **position):
+        """Draw ``text`` onto the screen.
+
+        The position is given as a keyword argument named like a
+        ``Rect`` attribute, e. g. ``topleft=(10, 10)`` or
+        ``center=(100, 50)``. Without a position the text is drawn at
+        the top left corner of the screen. Return the text's rectangle.
+        """
+        if isinstance(color, list):
+            color = tuple(color)
+        key = (text, fontname, fontsize, color)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self._layouts[key] = self.layout(
+                text, fontname, fontsize, color)
+            if len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(key)
+        return _blit_layout(layout[0], layout[1], position)
+
+    def clear(self):
+        """Drop all glyph surfaces and layouts."""
+        self._fonts.clear()
+        self._layouts.clear()
+
+
+def _blit_layout(glyphs, size, position):
+    """Blit the glyphs of a text layout at the given position."""
+    rect = pygame.Rect((0, 0), size)
+    for name, value in position.items():
+        setattr(rect, name, value)
+    x, y = rect.topleft
+    pgzero.game.screen.blits(
+        [(glyph, (x + dx, y + dy)) for glyph, (dx, dy) in glyphs],
+        doreturn=False)
+    return rect
+
+
+text_renderer = TextRenderer()
+"""The text renderer used by ``Label`` and by game objects."""
+
+
+class Label:
+    """A text drawn with the global ``text_renderer``.
+
+    The glyphs are composed into one surface again only when the
+    ``text`` attribute has been set to a different string. So a stage
+    can set e. g. a score label's text in every frame without extra
+    costs::
+
+        self.score_label = Label(topleft=(10, 10), color="black",
+                                 fontsize=20, fontname="zachary")
+        ...
+        def draw(self):
+            self.score_label.text = "Score: " + str(self._score)
+            self.score_label.draw()
+
+    The position is given as a keyword argument named like a
+    ``Rect`` attribute (see ``TextRenderer.draw()``).
+    """
+
+    def __init__(self, text="", fontname=None, fontsize=None, color=None,
+                 **position):
+        self.fontname = fontname
+        self.fontsize = fontsize
+        self.color = color
+        self.position = position
+        self._text = None
+        self._surface = None
+        self.text = text
+
+    @property
+    def text(self):
+        """The displayed string."""
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        text = str(text)
+        if text != self._text:
+            self._text = text
+            self._surface = None
+
+    def _get_surface(self):
+        """Compose the glyphs of the text into a single surface."""
+        if self._surface is None:
+            glyphs, size = text_renderer.layout(
+                self._text, self.fontname, self.fontsize, self.color)
+            self._surface = pygame.Surface(size, pygame.SRCALPHA)
+            # The glyphs don't overlap, so copy them including alpha:
+            self._surface.blits(
+                [(glyph, offset, None, pygame.BLEND_RGBA_MAX)
+                 for glyph, offset in glyphs],
+                doreturn=False)
+        return self._surface
+
+    @property
+    def size(self):
+        """Width and height of the text."""
+        return self._get_surface().get_size()
+
+    def draw(self):
+        """Draw the text onto the screen."""
+        surface = self._get_surface()
+        rect = surface.get_rect(**self.position)
+        pgzero.game.screen.blit(surface, rect)
+
+
+def _circles_overlap(a, b):
+    """Check if two circles ``(x, y, radius)`` overlap."""
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    r = a[2] + b[2]
+    return dx * dx + dy * dy < r * r
+
+
+def _box_axes(angle):
+    """Return the unit axes of a box rotated by ``angle`` degrees."""
+    rad = math.radians(angle)
+    c = math.cos(rad)
+    s = math.sin(rad)
+    # screen y axis points downwards:
+    return (c, -s), (s, c)
+
+
+def _circle_box_overlap(circle, box):
+    """Check if a circle ``(x, y, radius)`` and an oriented box overlap.
+
+    A box is given by ``(x, y, half_width, half_height, angle)``.
+    """
+    x, y, hw, hh, angle = box
+    u, v = _box_axes(angle)
+    dx = circle[0] - x
+    dy = circle[1] - y
+    # circle center in box coordinates, clamped into the box:
+    lx = dx * u[0] + dy * u[1]
+    ly = dx * v[0] + dy * v[1]
+    ex = lx - max(-hw, min(hw, lx))
+    ey = ly - max(-hh, min(hh, ly))
+    return ex * ex + ey * ey < circle[2] * circle[2]
+
+
+def _boxes_overlap(a, b):
+    """Check if two oriented boxes overlap using separating axes."""
+    a_axes = _box_axes(a[4])
+    b_axes = _box_axes(b[4])
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    for nx, ny in a_axes + b_axes:
+        ra = a[2] * abs(a_axes[0][0] * nx + a_axes[0][1] * ny) + \
+            a[3] * abs(a_axes[1][0] * nx + a_axes[1][1] * ny)
+        rb = b[2] * abs(b_axes[0][0] * nx + b_axes[0][1] * ny) + \
+            b[3] * abs(b_axes[1][0] * nx + b_axes[1][1] * ny)
+        if abs(dx * nx + dy * ny) >= ra + rb:
+            return False
+    return True
+
+
+def _circles_separation(a, b):
+    """Return the shortest vector that pushes circle ``a`` out of ``b``.
+
+    Return ``None`` if the circles do not overlap.
+    """
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    r = a[2] + b[2]
+    d = math.hypot(dx, dy)
+    if d >= r:
+        return None
+    if d == 0:
+        return (r, 0)
+    return (dx * (r - d) / d, dy * (r - d) / d)
+
+
+def _circle_box_separation(circle, box):
+    """Return the shortest vector that pushes a circle out of a box.
+
+    Return ``None`` if they do not overlap.
+    """
+    x, y, hw, hh, angle = box
+    u, v = _box_axes(angle)
+    dx = circle[0] - x
+    dy = circle[1] - y
+    lx = dx * u[0] + dy * u[1]
+    ly = dx * v[0] + dy * v[1]
+    ex = lx - max(-hw, min(hw, lx))
+    ey = ly - max(-hh, min(hh, ly))
+    r = circle[2]
+    d = math.hypot(ex, ey)
+    if d >= r:
+        return None
+    if d > 0:
+        px = ex * (r - d) / d
+        py = ey * (r - d) / d
+    elif hw - abs(lx) < hh - abs(ly):
+        # the center is inside the box:
+        px, py = math.copysign(hw - abs(lx) + r, lx), 0
+    else:
+        px, py = 0, math.copysign(hh - abs(ly) + r, ly)
+    # back from box coordinates to screen coordinates:
+    return (px * u[0] + py * v[0], px * u[1] + py * v[1])
+
+
+def _boxes_separation(a, b):
+    """Return the shortest vector that pushes box ``a`` out of box ``b``.
+
+    This is the separating axis with the least overlap. Return ``None``
+    if the boxes do not overlap.
+    """
+    a_axes = _box_axes(a[4])
+    b_axes = _box_axes(b[4])
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    best = None
+    for nx, ny in a_axes + b_axes:
+        ra = a[2] * abs(a_axes[0][0] * nx + a_axes[0][1] * ny) + \
+            a[3] * abs(a_axes[1][0] * nx + a_axes[1][1] * ny)
+        rb = b[2] * abs(b_axes[0][0] * nx + b_axes[0][1] * ny) + \
+            b[3] * abs(b_axes[1][0] * nx + b_axes[1][1] * ny)
+        distance = dx * nx + dy * ny
+        depth = ra + rb - abs(distance)
+        if depth <= 0:
+            return None
+        if best is None or depth < best[0]:
+            best = (depth, nx, ny, distance)
+    depth, nx, ny, distance = best
+    if distance > 0:
+        depth = -depth
+    return (nx * depth, ny * depth)
+
+
+def _shape_bounds(shape):
+    """Return ``(left, top, right, bottom)`` around a circle or a box."""
+    if len(shape) == 3:
+        x, y, r = shape
+        return (x - r, y - r, x + r, y + r)
+    x, y, hw, hh, angle = shape
+    u, v = _box_axes(angle)
+    w = abs(u[0]) * hw + abs(v[0]) * hh
+    h = abs(u[1]) * hw + abs(v[1]) * hh
+    return (x - w, y - h, x + w, y + h)
+
+
+def _shapes_separation(a, b):
+    """Return the shortest vector that pushes shape ``a`` out of ``b``.
+
+    The shapes are circles or boxes as returned by
+    ``GameObj._collision_geometry``. Return ``None`` if they do not
+    overlap.
+    """
+    if len(a) == 3:
+        if len(b) == 3:
+            return _circles_separation(a, b)
+        return _circle_box_separation(a, b)
+    if len(b) == 3:
+        push = _circle_box_separation(b, a)
+        return None if push is None else (-push[0], -push[1])
+    return _boxes_separation(a, b)
+
+
 class GameObj(Actor):
     """An actor on stage.
 
@@ -543,6 +2879,14 @@ class GameObj(Actor):
                  center_drawing_color=None,
                  pos_drawing_color=None,
                  rect_drawing_color=None,
+                 collision_shape="mask",
+                 collision_radius=None,
+                 mask_pyramid=False,
+                 fast=False,
+                 collision_layer=0,
+                 solid=False,
+                 movable=True,
+                 static=False,
                  **kwargs):
         """Create a game object with ``image`` and ``center`` position.
 
@@ -554,9 +2898,41 @@ class GameObj(Actor):
         image instead.
 
         If ``center_drawing_color``, ``pos_drawing_color``, or
-        ``rect_drawing_color`` are given, then this class will
+        ``rect_drawing_color`` are given, then the stage will
         draw a center point, a coordinate tuple, or
-        a bounding rectangle respectively.
+        a bounding rectangle respectively (see ``show_markers``).
+
+        ``collision_shape`` is one of ``COLLISION_SHAPES`` and
+        defines how ``overlaps`` checks for collisions:
+
+        * ``"mask"`` checks pixel-exactly with the image mask,
+        * ``"circle"`` uses a circle with ``collision_radius``
+          around the center. If the radius is ``None``, we take
+          half of the longer image side,
+        * ``"box"`` uses the bounding rectangle,
+        * ``"obb"`` uses the image rectangle turned by ``angle``.
+
+        If ``mask_pyramid`` is ``True`` for two overlapping game objects
+        with masks, then ``overlaps`` first compares coarse masks. This
+        is faster for large images with many transparent pixels.
+
+        A ``fast`` game object may move farther than its own size in
+        one update. Then ``overlaps`` also checks the path of its
+        moves during the current frame.
+
+        ``collision_layer`` is a number below ``Stage.LAYER_COUNT``. The
+        stage decides which layers collide (see
+        ``Stage.set_layer_collision``).
+
+        A ``solid`` game object is pushed out of other solid game
+        objects if its stage resolves collisions (see
+        ``Stage.resolve_collisions``). If it is not ``movable``, it
+        stays in place and only pushes others, like a wall.
+
+        A ``static`` game object is drawn once into the stage's static
+        layer together with the background. This is faster for
+        decoration that rarely changes. Static game objects are drawn
+        below all other game objects.
         """
         Actor.__init__(self, image, pos=pos, **kwargs)
         if speed is None:
@@ -568,6 +2944,38 @@ class GameObj(Actor):
         self.rect_drawing_color = rect_drawing_color
         self.center_drawing_color = center_drawing_color
         self.pos_drawing_color = pos_drawing_color
+        self.collision_shape = collision_shape
+        self.collision_radius = collision_radius
+        self.mask_pyramid = mask_pyramid
+        self.fast = fast
+        self.collision_layer = collision_layer
+        self.solid = solid
+        self.movable = movable
+        self.static = static
+        self._clip = None
+        self.clip_index = 0
+        self._clip_progress = 0
+
+    def __setattr__(self, attr, value):
+        """Set attribute and tell the stage when our rectangle changed."""
+        if attr == "collision_layer":
+            # Without a stage we only know the limit of all stages:
+            stage = self.__dict__.get("stage")
+            if stage is None:
+                Stage._check_layer(value, Stage.MAX_LAYER_COUNT)
+            else:
+                stage._check_layer(value)
+        Actor.__setattr__(self, attr, value)
+        if attr in _TRACKED_ATTRIBUTES:
+            stage = self.__dict__.get("stage")
+            if stage is not None:
+                stage._game_object_moved(self)
+        elif attr in _DRAWING_ATTRIBUTES:
+            stage = self.__dict__.get("stage")
+            if stage is not None:
+                stage._game_objects_changed()
+                if attr == "static" or self.__dict__.get("static"):
+                    stage._static_objects_changed()
 
     @property
     def image(self):
@@ -585,18 +2993,147 @@ class GameObj(Actor):
         Second ``Actor`` is buggy when setting the image to a rotated actor.
         In that case the overwriting setter calculates the new
         image depending on the current rotation.
+
+        If the image is part of the current ``Atlas``, it is taken
+        from there. Otherwise it is converted with ``convert_for_display``.
+
+        Setting an image stops a playing ``AnimationClip``.
         """
+        if self.__dict__.get("_clip") is not None:
+            self.stop()
+        self._frame_rotations = None
         if image is None:
             # Unfortunately we need to access private attributes:
             self._image_name = None
             self._orig_surf = self._surf = GameObj.DEFAULT_IMAGE
             self._update_pos()
+        elif Atlas.current is not None and image in Atlas.current:
+            self._image_name = image
+            self._orig_surf = self._surf = Atlas.current.get(image)
+            self._update_pos()
         else:
             # https://stackoverflow.com/questions/1021464/how-to-call-a-property-of-the-base-class-if-this-property-is-being-overwritten-i/1021484
             Actor.image.fset(self, image)
+            self._orig_surf = self._surf = convert_for_display(
+                self._orig_surf)
 
         # adjust image rotation by setting angle again
-        Actor.angle.fset(self, self.angle)
+        GameObj.angle.fset(self, self.angle)
+
+    @property
+    def angle(self):
+        """Rotation angle in degrees, counter clockwise."""
+        return self._angle
+
+    @angle.setter
+    def angle(self, angle):
+        """Set the rotation angle.
+
+        This overwrites an ``Actor`` property in order to take the rotated
+        image from ``rotation_cache`` instead of rotating it each time.
+        The image is rotated by the angle rounded to the cache's
+        ``angle_step``.
+        """
+        self._angle = angle
+        self._surf = self._rotated(angle)
+        p = self.pos
+        self.width, self.height = self._surf.get_size()
+        w, h = self._orig_surf.get_size()
+        ax, ay = self._untransformed_anchor
+        self._anchor = transform_anchor(
+            ax, ay, w, h, rotation_cache.quantize(angle))
+        self.pos = p
+
+    def _rotated(self, angle):
+        """Return the current image rotated by ``angle``."""
+        rotations = self.__dict__.get("_frame_rotations")
+        if rotations is not None:
+            rotated = rotations.get(rotation_cache.quantize(angle))
+            if rotated is not None:
+                return rotated
+        return rotation_cache.get(self._orig_surf, angle)
+
+    @property
+    def clip(self):
+        """The playing ``AnimationClip`` or ``None``."""
+        return self._clip
+
+    def play(self, clip, restart=True):
+        """Show the images of an ``AnimationClip``.
+
+        If the clip is already playing and ``restart`` is ``False``,
+        it just goes on.
+        """
+        if clip is self._clip and not restart:
+            return
+        clip._resolve()
+        if self.stage is not None:
+            self.stage._animation_stopped(self)
+        self._frame_rotations = None
+        self._clip = clip
+        self._clip_progress = 0
+        self._show_frame(0)
+        if self.stage is not None:
+            self.stage._animation_started(self)
+
+    def stop(self):
+        """Stop the playing clip and keep showing the current frame."""
+        if self.stage is not None:
+            self.stage._animation_stopped(self)
+        self._clip = None
+
+    def _advance_clip(self, amount):
+        """Advance the clip by seconds or pixels."""
+        clip = self._clip
+        self._clip_progress += amount
+        step = clip.frame_duration or clip.frame_distance
+        if self._clip_progress < step:
+            return
+        flips = int(self._clip_progress // step)
+        self._clip_progress -= flips * step
+        index = self.clip_index + flips
+        if index >= len(clip):
+            if clip.loop:
+                index %= len(clip)
+            else:
+                index = len(clip) - 1
+                self.stop()
+        if index != self.clip_index:
+            self._show_frame(index, clip)
+
+    def _show_frame(self, index, clip=None):
+        """Show a frame of the clip without looking up any image names."""
+        if clip is None:
+            clip = self._clip
+        frame = clip._frames[index]
+        self.clip_index = index
+        self._image_name = clip.images[index]
+        if clip._rotations is not None:
+            self._frame_rotations = clip._rotations[index]
+        angle = rotation_cache.quantize(self._angle)
+        key = (index, self._anchor_value, angle)
+        anchors = clip._anchors.get(key)
+        if anchors is None:
+            w, h = frame.get_size()
+            ax = calculate_anchor(self._anchor_value[0], "x", w)
+            ay = calculate_anchor(self._anchor_value[1], "y", h)
+            anchors = clip._anchors[key] = (
+                (ax, ay), transform_anchor(ax, ay, w, h, angle))
+        # Keep the position; set the rectangle without notifying the
+        # stage for each attribute:
+        r = self._rect
+        ax, ay = self._anchor
+        x = r.x + ax
+        y = r.y + ay
+        self._orig_surf = frame
+        self._surf = self._rotated(self._angle)
+        self._untransformed_anchor, self._anchor = anchors
+        ax, ay = self._anchor
+        r.x = x - ax
+        r.y = y - ay
+        r.size = self._surf.get_size()
+        if self.stage is not None:
+            self.stage._game_object_moved(self)
 
     @property
     def rect(self):
@@ -605,39 +3142,262 @@ class GameObj(Actor):
 
     @property
     def mask(self):
-        """An image mask for collision detection."""
+        """An image mask for collision detection.
+
+        The mask is taken from ``mask_bank``, so its rotation is
+        rounded to the bank's ``angle_step``. The mask is centered
+        on the center of this game object.
+        """
         # Unfortunately pgzero's Actor does not exhibit the image surface as
-        # public property. So we need to access the private _surf attribute.
-        return pygame.mask.from_surface(self._surf)
+        # public property. So we need to access the private _orig_surf
+        # attribute.
+        return mask_bank.get(self._orig_surf, self.angle)
+
+    def _mask_pyramid(self):
+        """Return the coarse masks of ``mask``, see ``MaskBank``."""
+        return mask_bank.get_pyramid(self._orig_surf, self.angle)
+
+    def _mask_topleft(self, mask):
+        """Return the screen position of ``mask``'s top left corner."""
+        w, h = mask.get_size()
+        return (self._rect.centerx - w / 2, self._rect.centery - h / 2)
+
+    def _collision_radius(self):
+        if self.collision_radius is not None:
+            return self.collision_radius
+        return max(self._orig_surf.get_size()) / 2
+
+    def _collision_bounds(self):
+        """Return ``(left, top, right, bottom)`` around the collision shape.
+
+        The bounds include the image, too. Circles and oriented boxes
+        may reach beyond the image: an oriented box turns by the exact
+        ``angle``, while the image is turned by a rounded angle.
+        """
+        r = self._rect
+        bounds = (r.x, r.y, r.x + r.w, r.y + r.h)
+        if self.collision_shape in ("circle", "obb"):
+            left, top, right, bottom = _shape_bounds(
+                self._collision_geometry())
+            bounds = (min(bounds[0], left), min(bounds[1], top),
+                      max(bounds[2], right), max(bounds[3], bottom))
+        return bounds
+
+    def _collision_geometry(self):
+        """Return our collision shape as circle or oriented box tuple.
+
+        A circle is ``(x, y, radius)``, a box is
+        ``(x, y, half_width, half_height, angle)``. A mask is
+        approximated by its bounding box.
+        """
+        r = self._rect
+        shape = self.collision_shape
+        if shape == "circle":
+            return (r.centerx, r.centery, self._collision_radius())
+        if shape == "obb":
+            w, h = self._orig_surf.get_size()
+            return (r.centerx, r.centery, w / 2, h / 2, self.angle)
+        if shape in ("box", "mask"):
+            return (r.centerx, r.centery, r.w / 2, r.h / 2, 0)
+        raise ValueError(
+            "Unknown collision shape %r, expected one of %s" %
+            (shape, ", ".join(COLLISION_SHAPES)))
+
+    def _sweep(self):
+        """Return the ``(x, y)`` distance moved during the current sweep.
+
+        Return ``None`` if there is no sweep, i. e. if this game object
+        is not ``fast`` or has not moved during the current frame (see
+        ``Stage._start_sweep``).
+        """
+        if self.stage is None:
+            return None
+        start = self.stage._sweep_starts.get(self)
+        if start is None or start[2] != pgzero.clock.clock.t:
+            return None
+        r = self._rect
+        return (r.centerx - start[0], r.centery - start[1])
+
+    def _sweep_overlaps(self, other):
+        """Check if one game object passed through the other one.
+
+        Circles are swept as circles, all other collision shapes as
+        their bounding boxes. This only counts if the game objects were
+        apart at the start of the sweep, met on the way, and are apart
+        at the end: whether they overlap at their current positions is
+        up to the exact check of their collision shapes.
+        """
+        hop = self._sweep()
+        other_hop = other._sweep()
+        if hop is None and other_hop is None:
+            return False
+        hop = hop or (0, 0)
+        other_hop = other_hop or (0, 0)
+        # We look at the movement relative to the other game object:
+        dx = hop[0] - other_hop[0]
+        dy = hop[1] - other_hop[1]
+        if dx == 0 and dy == 0:
+            return False
+        a = self._collision_geometry()
+        b = other._collision_geometry()
+        sx = (a[0] - hop[0]) - (b[0] - other_hop[0])
+        sy = (a[1] - hop[1]) - (b[1] - other_hop[1])
+        if len(a) == 3 and len(b) == 3:
+            r = a[2] + b[2]
+            ex = sx + dx
+            ey = sy + dy
+            if sx * sx + sy * sy <= r * r or ex * ex + ey * ey <= r * r:
+                return False  # in contact at the start or at the end
+            # closest point of the path to the other center:
+            t = -(sx * dx + sy * dy) / (dx * dx + dy * dy)
+            cx = sx + t * dx
+            cy = sy + t * dy
+            return 0 < t < 1 and cx * cx + cy * cy <= r * r
+        hw = self._rect.w / 2 if len(a) == 5 else a[2]
+        hh = self._rect.h / 2 if len(a) == 5 else a[2]
+        other_hw = other._rect.w / 2 if len(b) == 5 else b[2]
+        other_hh = other._rect.h / 2 if len(b) == 5 else b[2]
+        w = hw + other_hw
+        h = hh + other_hh
+        if abs(sx) <= w and abs(sy) <= h or \
+                abs(sx + dx) <= w and abs(sy + dy) <= h:
+            return False  # in contact at the start or at the end
+        t = _ray_enters_bounds(sx, sy, dx, dy, (-w, -h, w, h))
+        return t is not None and t < 1
+
+    def _separation(self, other):
+        """Return the shortest vector that pushes us out of ``other``.
+
+        Return ``None`` if we do not overlap. For two masks the
+        vector is estimated from the bounding box of the overlapping
+        pixels.
+        """
+        if self.collision_shape == "mask" and other.collision_shape == "mask":
+            if not self._rect.colliderect(other._rect):
+                return None
+            mask = self.mask
+            other_mask = other.mask
+            x, y = self._mask_topleft(mask)
+            other_x, other_y = other._mask_topleft(other_mask)
+            offset = (round(x - other_x), round(y - other_y))
+            rects = other_mask.overlap_mask(mask, offset).get_bounding_rects()
+            if not rects:
+                return None
+            r = rects[0].unionall(rects[1:])
+            if r.w < r.h:
+                return (math.copysign(r.w, self.x - other.x), 0)
+            return (0, math.copysign(r.h, self.y - other.y))
+        return _shapes_separation(self._collision_geometry(),
+                                  other._collision_geometry())
 
     def overlaps(self, other):
-        """Check for pixel-exact overlap of two game objects."""
+        """Check for overlap of two game objects.
+
+        If both game objects have a ``"mask"`` collision shape, the
+        check is pixel-exact. Otherwise the collision shapes are
+        compared, where a mask counts as its bounding box.
+
+        If one of the game objects is ``fast``, its path during the
+        current frame is checked as well, in order to find game objects
+        it passed through.
+
+        Game objects never overlap if their stage says that their
+        collision layers do not collide.
+        """
+        if self.stage is not None and not self.stage.layers_collide(
+                self.collision_layer, other.collision_layer):
+            return False
+        if self._sweep_overlaps(other):
+            return True
+        if self.collision_shape != "mask" or \
+                other.collision_shape != "mask":
+            a = self._collision_geometry()
+            b = other._collision_geometry()
+            if len(a) == 3:
+                if len(b) == 3:
+                    return _circles_overlap(a, b)
+                return _circle_box_overlap(a, b)
+            if len(b) == 3:
+                return _circle_box_overlap(b, a)
+            return _boxes_overlap(a, b)
         if self.colliderect(other):
-            ox = round(self.topleft[0] - other.topleft[0])
-            oy = round(self.topleft[1] - other.topleft[1])
-            offset = (ox, oy)
-            if other.mask.overlap(self.mask, offset) is not None:
+            mask = self.mask
+            other_mask = other.mask
+            x, y = self._mask_topleft(mask)
+            other_x, other_y = other._mask_topleft(other_mask)
+            offset = (round(x - other_x), round(y - other_y))
+            if self.mask_pyramid and other.mask_pyramid:
+                pyramid = self._mask_pyramid()
+                other_pyramid = other._mask_pyramid()
+                for (factor, coarse, dummy), (dummy, dummy, other_dilated) \
+                        in zip(pyramid, other_pyramid):
+                    coarse_offset = (offset[0] // factor + 1,
+                                     offset[1] // factor + 1)
+                    if other_dilated.overlap(coarse, coarse_offset) is None:
+                        return False
+            if other_mask.overlap(mask, offset) is not None:
                 return True
         return False
 
+    show_markers = True
+    """Draw the markers of game objects of this class.
+
+    Markers are a center point, a coordinate tuple, or a bounding
+    rectangle, see ``center_drawing_color``, ``pos_drawing_color``, and
+    ``rect_drawing_color``. Set e. g. ``Worm.show_markers = False`` in
+    order to hide the markers of all worms (see also
+    ``Stage.show_markers``).
+    """
+
     def draw(self):
-        """Draw image and additional artifacts.
+        """Draw image.
 
-        This additionally draws a center point, a coordinate tuple, or
-        a bounding rectangle, if the respective attributes have
-        been set to a color.
+        Markers of game objects on a stage are drawn separately by the
+        stage above all game objects (see ``show_markers``). A game
+        object that is not on a stage draws its markers itself.
         """
         Actor.draw(self)
-        if getattr(self, "center_drawing_color", None) is not None:
-            _PGZ.screen.draw.filled_circle(self.center,
-                                           5, self.center_drawing_color)
-        if getattr(self, "rect_drawing_color", None) is not None:
-            _PGZ.screen.draw.rect(self.rect, self.rect_drawing_color)
-        if getattr(self, "pos_drawing_color", None) is not None:
-            _PGZ.screen.draw.text(
+        if self.stage is None and self.show_markers and \
+                self._has_markers():
+            self._draw_markers()
+
+    def _has_markers(self):
+        """Check if one of the ``..._drawing_color`` attributes is set."""
+        return getattr(self, "center_drawing_color", None) is not None or \
+            getattr(self, "rect_drawing_color", None) is not None or \
+            getattr(self, "pos_drawing_color", None) is not None
+
+    def _draw_markers(self):
+        """Draw center point, coordinate tuple, and bounding rectangle.
+
+        If the stage has a camera, the markers are drawn where the
+        camera shows this game object. Return the list of rectangles
+        that have been drawn.
+        """
+        center = self.center
+        rect = self.rect
+        camera = self.stage.camera if self.stage is not None else None
+        if camera is not None:
+            center = camera.world_to_screen(center)
+            left, top = camera.world_to_screen(rect.topleft)
+            rect = pygame.Rect(round(left), round(top),
+                               round(rect.w * camera.zoom),
+                               round(rect.h * camera.zoom))
+        surface = pgzero.game.screen
+        drawn = []
+        if self.center_drawing_color is not None:
+            drawn.append(pygame.draw.circle(
+                surface, pygame.Color(self.center_drawing_color),
+                (round(center[0]), round(center[1])), 5))
+        if self.rect_drawing_color is not None:
+            drawn.append(pygame.draw.rect(
+                surface, pygame.Color(self.rect_drawing_color), rect, 1))
+        if self.pos_drawing_color is not None:
+            drawn.append(text_renderer.draw(
                 ("(%d,%d)" % (round(self.x), round(self.y))),
-                midtop=(self.center),
-                color=self.pos_drawing_color)
+                midtop=center,
+                color=self.pos_drawing_color))
+        return drawn
 
     def act(self):
         """Act - empty method, game objects have no default action."""
@@ -671,7 +3431,7 @@ class GameObj(Actor):
         """
         if self.stage is not None:
             self.leave_stage()
-        stage.game_objects.append(self)
+        stage._add_game_object(self)
         self.stage = stage
 
     def leave_stage(self):
@@ -701,10 +3461,20 @@ class GameObj(Actor):
         self.angle += angle
 
     def move(self, distance=None):
-        """Move forward in the current direction."""
+        """Move forward in the current direction.
+
+        For a ``fast`` game object the stage remembers where
+        it started moving during the current frame. A playing
+        ``AnimationClip`` with a ``frame_distance`` advances by the
+        distance.
+        """
         hop_x, hop_y = self.next_hop(distance)
+        if self.fast and self.stage is not None:
+            self.stage._start_sweep(self)
         self.x += hop_x
         self.y += hop_y
+        if self._clip is not None and self._clip.frame_distance is not None:
+            self._advance_clip(math.hypot(hop_x, hop_y))
 
     def next_hop(self, distance=None):
         """Get (x,y) tuple where a ``move(distance)`` call would finish."""
@@ -719,13 +3489,18 @@ class GameObj(Actor):
         """Check, if we can move forward without leaving the stage.
 
         If we get beyond one of the edges of the stage, return ``False``.
+        If the stage has a ``tile_map``, also return ``False`` if we
+        would touch a solid tile on our way.
         """
         if self.stage is None:
             raise RuntimeError(
                 "This game object has not been added to a stage")
         move = self.next_hop(distance)
-        return not self.stage.is_beyond_edge(
-            (self.x + move[0], self.y + move[1]), edge=edge)
+        if self.stage.is_beyond_edge(
+                (self.x + move[0], self.y + move[1]), edge=edge):
+            return False
+        tile_map = self.stage.tile_map
+        return tile_map is None or tile_map.can_move(self, distance)
 
     def speed_up(self):
         """Increment current speed by 0.1.
@@ -765,3 +3540,315 @@ class GameObj(Actor):
         A full orbit is 360 degrees.
         """
         return math.floor(self.total_orbit_angle / 360)
+
+
+class Terrain(GameObj):
+    """Destructible ground, e. g. for games like "Worms".
+
+    The terrain is a game object with its own copy of an image that can
+    be changed with ``erase_circle`` and ``add_polygon``. Its collision
+    mask is kept up to date incrementally: the mask is divided into
+    tiles of ``TILE_SIZE`` pixels, and only the tiles touched by a
+    change are recomputed. So ``overlaps`` works pixel-exactly against
+    the current shape of the terrain. The same holds for the coarse
+    masks used with ``mask_pyramid``.
+
+    A terrain is never rotated.
+    """
+
+    TILE_SIZE = 64
+    """Size in pixels of the mask tiles, a multiple of 16."""
+
+    def __init__(self, image=None, size=None, topleft=(0, 0)):
+        """Create a terrain from an image name or with an empty ``size``."""
+        if image is not None:
+            surface = loaders.images.load(image).copy()
+        else:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+        # Unfortunately we need to access private attributes:
+        self._image_name = None
+        self._orig_surf = self._surf = surface
+        self._update_pos()
+        self.topleft = topleft
+        self._terrain_mask = pygame.mask.from_surface(surface)
+        self._dirty_tiles = set()
+        self._pyramid = None  # built on first use
+        self._dirty_pyramid_tiles = set()
+
+    @property
+    def mask(self):
+        """The current collision mask, see ``GameObj.mask``."""
+        if self._dirty_tiles:
+            self._update_mask()
+        return self._terrain_mask
+
+    def erase_circle(self, pos, radius):
+        """Make a circular hole at ``pos`` (in stage coordinates)."""
+        changed = pygame.draw.circle(
+            self._surf, (0, 0, 0, 0), self._to_local(pos), radius)
+        self._mark_dirty(changed)
+
+    def add_polygon(self, points, color):
+        """Add ground within a polygon (in stage coordinates)."""
+        changed = pygame.draw.polygon(
+            self._surf, color, [self._to_local(p) for p in points])
+        self._mark_dirty(changed)
+
+    def _to_local(self, pos):
+        return (round(pos[0] - self.left), round(pos[1] - self.top))
+
+    def _mark_dirty(self, rect):
+        ts = self.TILE_SIZE
+        rect = rect.clip(self._surf.get_rect())
+        for row in range(rect.top // ts, (rect.bottom - 1) // ts + 1):
+            for column in range(rect.left // ts, (rect.right - 1) // ts + 1):
+                self._dirty_tiles.add((column, row))
+                self._dirty_pyramid_tiles.add((column, row))
+        Camera._forget(self._surf)
+        if self.stage is not None:
+            self.stage._game_object_moved(self)
+
+    def _update_mask(self):
+        """Recompute the mask bits of all dirty tiles."""
+        ts = self.TILE_SIZE
+        bounds = self._surf.get_rect()
+        for column, row in self._dirty_tiles:
+            tile = pygame.Rect(column * ts, row * ts, ts, ts).clip(bounds)
+            self._terrain_mask.erase(
+                pygame.mask.Mask(tile.size, fill=True), tile.topleft)
+            self._terrain_mask.draw(
+                pygame.mask.from_surface(self._surf.subsurface(tile)),
+                tile.topleft)
+        self._dirty_tiles.clear()
+
+    def _mask_pyramid(self):
+        """Return the coarse masks of the current terrain mask.
+
+        Like the mask, they are recomputed only under dirty tiles.
+        """
+        mask = self.mask
+        if self._pyramid is None:
+            self._pyramid = [MaskBank._downsample(mask, factor)
+                             for factor in MaskBank.PYRAMID_FACTORS]
+            self._dirty_pyramid_tiles.clear()
+        if not self._dirty_pyramid_tiles:
+            return self._pyramid
+        ts = self.TILE_SIZE
+        bounds = self._surf.get_rect()
+        tiles = [pygame.Rect(column * ts, row * ts, ts, ts).clip(bounds)
+                 for column, row in self._dirty_pyramid_tiles]
+        self._dirty_pyramid_tiles.clear()
+        for factor, coarse, dilated in self._pyramid:
+            areas = []
+            for tile in tiles:
+                tile_mask = pygame.mask.Mask(tile.size)
+                tile_mask.draw(mask, (-tile.x, -tile.y))
+                tile_coarse = MaskBank._downsample(tile_mask, factor)[1]
+                x, y = tile.x // factor, tile.y // factor
+                coarse.erase(pygame.mask.Mask(tile_coarse.get_size(),
+                                              fill=True), (x, y))
+                coarse.draw(tile_coarse, (x, y))
+                areas.append((x, y) + tile_coarse.get_size())
+            # A dilated bit depends on its own, left and upper coarse bit:
+            for x, y, w, h in areas:
+                near = pygame.mask.Mask((w + 2, h + 2))
+                near.draw(coarse, (1 - x, 1 - y))
+                area = pygame.mask.Mask((w + 1, h + 1))
+                for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+                    area.draw(near, (dx - 1, dy - 1))
+                dilated.erase(pygame.mask.Mask((w + 1, h + 1), fill=True),
+                              (x, y))
+                dilated.draw(area, (x, y))
+        return self._pyramid
+
+
+_export_job = None  # (frames, frame size, image size, path, format)
+"""The export job of a ``FrameExporter`` worker process."""
+
+
+def _start_export_worker(frames, frame_size, size, path, format):
+    """Initialize a worker process of a ``FrameExporter``."""
+    global _export_job
+    _export_job = (memoryview(frames).cast("B"), frame_size, size,
+                   path, format)
+
+
+def _export_frame(slot, index):
+    """Encode or write frame ``index`` from buffer ``slot``."""
+    frames, frame_size, size, path, format = _export_job
+    view = frames[slot * frame_size:(slot + 1) * frame_size]
+    try:
+        if format == "png":
+            surface = pygame.image.frombuffer(view, size, "RGBX")
+            pygame.image.save(surface, path % index)
+            del surface
+        else:
+            with open(path, "r+b") as file:
+                file.seek(index * frame_size)
+                file.write(view)
+    finally:
+        view.release()
+
+
+class FrameExporter:
+    """Render frames of a stage off-screen and save them in the background.
+
+    The frames are drawn into buffers in shared memory, which a
+    ``multiprocessing`` pool reads without copying. The pool either
+    encodes each frame as a PNG file or writes it into a raw video
+    file. Meanwhile the game goes on with the next frame; only if all
+    ``buffers`` are still in use, it waits.
+
+    For ``format="png"``, ``path`` is a directory or a file name
+    pattern like ``"clip/frame%05d.png"``. For ``format="raw"`` it is
+    the name of a file that gets the frames in RGBX format, one after
+    another, e. g. for
+    ``ffmpeg -f rawvideo -pixel_format rgb0 -video_size 560x460``.
+
+    Record a game session without a window, e. g. in a script of its
+    own. The environment variable ``SDL_VIDEODRIVER`` has to be
+    ``"dummy"``, and Pygame Zero's image loader still needs a display
+    mode::
+
+        pygame.display.set_mode((WIDTH, HEIGHT))
+        with FrameExporter("clip") as exporter:
+            exporter.record(Beach(), frames=600)
+
+    or capture the current stage during a normal game, e. g. at the
+    end of the stage's ``draw`` method::
+
+        exporter.capture()
+
+    Called while drawing, ``capture`` does not draw the stage again but
+    copies the screen once the frame is complete.
+
+    Call ``close`` when done, in order to wait for the pool.
+    """
+
+    def __init__(self, path, size=None, format="png", processes=None,
+                 buffers=None):
+        if format not in ("png", "raw"):
+            raise ValueError("format must be \"png\" or \"raw\"")
+        if size is None:
+            size = (_PGZ.WIDTH, _PGZ.HEIGHT)
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if buffers is None:
+            buffers = 2 * processes
+        self.size = size
+        self.format = format
+        if format == "png":
+            if "%" not in path:
+                os.makedirs(path, exist_ok=True)
+                path = os.path.join(path, "frame%05d.png")
+        else:
+            open(path, "wb").close()
+        self.path = path
+        self.frame_count = 0
+        frame_size = size[0] * size[1] * 4
+        self._frames = multiprocessing.RawArray("B", buffers * frame_size)
+        view = memoryview(self._frames).cast("B")
+        self._surfaces = [
+            pygame.image.frombuffer(
+                view[i * frame_size:(i + 1) * frame_size], size, "RGBX")
+            for i in range(buffers)]
+        self._pending = [None] * buffers
+        self._pool = multiprocessing.Pool(
+            processes, _start_export_worker,
+            (self._frames, frame_size, size, path, format))
+
+    def capture(self, stage=None):
+        """Draw ``stage`` (default: the current stage) and save the frame.
+
+        Return the number of the frame.
+
+        During drawing (e. g. from a ``draw`` method), the frame is
+        copied from the screen after drawing instead; drawing the stage
+        from within its own ``draw`` method would never end.
+        """
+        if stage is None:
+            stage = Stage.current
+        slot = self.frame_count % len(self._surfaces)
+        if self._pending[slot] is not None:
+            self._pending[slot].get()
+            self._pending[slot] = None
+        index = self.frame_count
+        self.frame_count += 1
+        if Stage._frame_captures is not None:
+            Stage._frame_captures.append((self, slot, index))
+        else:
+            _draw_off_screen(stage, self._surfaces[slot])
+            self._export(slot, index)
+        return index
+
+    def _copy_frame(self, slot, index, surface):
+        """Copy ``surface`` into buffer ``slot`` as frame ``index``."""
+        if surface.get_size() == self.size:
+            self._surfaces[slot].blit(surface, (0, 0))
+        else:
+            pygame.transform.scale(surface, self.size, self._surfaces[slot])
+        self._export(slot, index)
+
+    def _export(self, slot, index):
+        """Hand the frame in buffer ``slot`` over to the pool."""
+        self._pending[slot] = self._pool.apply_async(
+            _export_frame, (slot, index))
+
+    def record(self, stage, frames, dt=1 / 60):
+        """Update and capture ``stage`` for ``frames`` frames.
+
+        This runs the game without Pygame Zero's main loop, as fast as
+        possible, with a frame time of ``dt`` seconds. Scheduled
+        ``clock`` functions are called as usual.
+        """
+        previous = Stage.current
+        Stage.current = stage
+        try:
+            for dummy in range(frames):
+                pgzero.clock.tick(dt)
+                update(dt)
+                self.capture(stage)
+        finally:
+            Stage.current = previous
+
+    def close(self):
+        """Wait until all frames are saved and stop the pool."""
+        try:
+            for pending in self._pending:
+                if pending is not None:
+                    pending.get()
+        finally:
+            self._pending = [None] * len(self._pending)
+            self._pool.close()
+            self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _draw_off_screen(stage, surface):
+    """Draw ``stage`` into ``surface`` like the global ``draw`` hook.
+
+    Without Pygame Zero's main loop there is no ``screen``, so we
+    provide one for the time of drawing.
+    """
+    mod = _PGZ.get_builtins_mod()
+    has_screen = hasattr(mod, "screen")
+    if not has_screen:
+        mod.screen = pgzero.screen.Screen(surface)
+    previous = Stage.current
+    Stage.current = stage
+    # A dirty rectangle stage must draw completely here and on screen:
+    Stage._last_drawn = None
+    restore = _draw_into(surface)
+    try:
+        draw()
+    finally:
+        restore()
+        Stage.current = previous
+        Stage._last_drawn = None
+        if not has_screen:
+            del mod.screen
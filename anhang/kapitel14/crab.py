@@ -78,6 +78,10 @@ class Start(Stage):
 class Beach(Stage):
     def __init__(self):
         self.background_image = "sand"
+        self._score_label = Label(topleft=(10, 10), color="black",
+                                  fontsize=20, fontname="zachary")
+        self._level_label = Label(topleft=(10, 35), color="black",
+                                  fontsize=20, fontname="zachary")
 
     def reset_game(self):
         self._level = 1
@@ -155,10 +159,10 @@ class Beach(Stage):
         return Worm((random.randrange(WIDTH), random.randrange(HEIGHT)))
 
     def draw(self):
-        screen.draw.text("Score: " + str(self._score), topleft=(10, 10),
-                         color="black", fontsize=20, fontname="zachary")
-        screen.draw.text("Level: " + str(self._level), topleft=(10, 35),
-                         color="black", fontsize=20, fontname="zachary")
+        self._score_label.text = "Score: " + str(self._score)
+        self._score_label.draw()
+        self._level_label.text = "Level: " + str(self._level)
+        self._level_label.draw()
         if self._defeated:
             screen.draw.text(
                 "You lose!",
@@ -177,22 +181,17 @@ class Beach(Stage):
 
 class Crab(GameObj):
 
-    IMAGE_PREFIX = "crab"
-    IMAGE_COUNT = 6
     TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS = 5
+    ANIMATION = AnimationClip.from_prefix(
+        "crab", 6, frame_distance=TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS)
 
     def __init__(self, pos):
-        self._set_image_index(0)
+        self.play(Crab.ANIMATION)
         self.pos = pos
         self.speed = 0
-        self.traveled = 0
         self.shielded = False
         self.shield_energy = 10
 
-    def _set_image_index(self, image_index):
-        self.image_index = image_index
-        self.image = Crab.IMAGE_PREFIX + str(image_index)
-
     def draw(self):
         if self.shielded:
             shield = Actor("shield", self.pos)
@@ -207,10 +206,8 @@ class Crab(GameObj):
             x -= 10
 
     def act(self):
-        self.switch_image()
         if self.can_move(self.speed):
             self.move(self.speed)
-            self.traveled += abs(self.speed)
         else:
             self.speed = 0
         self.stage.take_out_neighbouring_worms(self)
@@ -230,80 +227,51 @@ class Crab(GameObj):
     def unshield(self):
         self.shielded = False
 
-    def switch_image(self):
-        if self.traveled > Crab.TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS:
-            self._set_image_index((self.image_index + 1) % Crab.IMAGE_COUNT)
-            self.traveled -= Crab.TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS
-
 
 class Lobster(GameObj):
 
-    IMAGE_PREFIX = "lobster"
-    IMAGE_COUNT = 2
     TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS = 7
+    ANIMATION = AnimationClip.from_prefix(
+        "lobster", 2, frame_distance=TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS)
 
     def __init__(self, pos, speed, drunkenness, jumpiness):
-        self._set_image_index(0)
+        self.play(Lobster.ANIMATION)
         self.pos = pos
         self.speed = speed
-        self.traveled = 0
         self.drunkenness = drunkenness
         self.jumpiness = jumpiness
 
-    def _set_image_index(self, image_index):
-        self.image_index = image_index
-        self.image = Lobster.IMAGE_PREFIX + str(image_index)
-
     def act(self):
-        self.switch_image()
         if self.can_move(self.speed):
             self.move(self.speed)
-            self.traveled += abs(self.speed)
         else:
             self.turn(25)
         if random.randrange(10) < self.drunkenness:
             self.turn(random.uniform(-self.jumpiness, self.jumpiness))
         self.stage.take_out_neighbouring_crab(self)
 
-    def switch_image(self):
-        if self.traveled > Lobster.TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS:
-            self._set_image_index((self.image_index + 1) % Lobster.IMAGE_COUNT)
-            self.traveled -= Lobster.TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS
-
 
 class Worm(GameObj):
 
-    IMAGE_PREFIX = "worm"
-    IMAGE_COUNT = 2
     TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS = 3
+    ANIMATION = AnimationClip.from_prefix(
+        "worm", 2, frame_distance=TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS)
 
     def __init__(self, pos):
-        self._set_image_index(0)
+        self.play(Worm.ANIMATION)
         self.pos = pos
         self.speed = 0.5
         if random.randrange(2) == 0:
             self.speed = -self.speed
-        self.traveled = 0
-
-    def _set_image_index(self, image_index):
-        self.image_index = image_index
-        self.image = Worm.IMAGE_PREFIX + str(image_index)
 
     def act(self):
-        self.switch_image()
         if self.can_move(self.speed):
             self.move(self.speed)
-            self.traveled += abs(self.speed)
         else:
             self.speed = -self.speed
         if random.randrange(100) < 10:
             self.speed += random.uniform(-1, 1) / 50
 
-    def switch_image(self):
-        if self.traveled > Worm.TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS:
-            self._set_image_index((self.image_index + 1) % Worm.IMAGE_COUNT)
-            self.traveled -= Worm.TRAVEL_DISTANCE_BETWEEN_IMAGE_FLIPS
-
 
 def toggle_sound():
     if SOUND_BUTTON.currently_playing:
@@ -0,0 +1,101 @@
+"""Regression tests for pgzo.py.
+
+Run with ``python -m pytest`` from the ``anhang`` directory. The tests
+use the ``pgzo.py`` and the images of ``kapitel14`` and need no
+window.
+"""
+
+import os
+import sys
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+CHAPTER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "..", "kapitel14")
+sys.path.insert(0, CHAPTER)
+
+import __main__
+__main__.WIDTH = 560
+__main__.HEIGHT = 460
+
+import pgzero.clock
+import pgzero.loaders
+
+pygame.init()
+pygame.display.set_mode((560, 460))
+pgzero.loaders.set_root(CHAPTER)
+
+import pgzo
+from pgzo import GameObj, Stage
+
+
+def test_fast_game_object_spawned_on_shooter_does_not_overlap_it():
+    stage = Stage()
+    shooter = GameObj(image="crab0", pos=(100, 100))
+    shooter.appear_on_stage(stage)
+    bullet = GameObj(image="worm0", pos=(100, 100), fast=True)
+    bullet.appear_on_stage(stage)
+    stage.update()
+    bullet.move(80)
+    assert not bullet.colliderect(shooter)
+    assert not bullet.overlaps(shooter)
+    assert not shooter.overlaps(bullet)
+
+
+def test_fast_game_object_passing_through_overlaps():
+    stage = Stage()
+    wall = GameObj(image="worm0", pos=(200, 300))
+    wall.angle = 90
+    wall.appear_on_stage(stage)
+    bullet = GameObj(image="worm0", pos=(0, 300), fast=True)
+    bullet.appear_on_stage(stage)
+    stage.update()
+    bullet.move(400)
+    assert not bullet.colliderect(wall)
+    assert bullet.overlaps(wall)
+
+
+def test_sweep_ends_with_the_frame_without_stage_update():
+    # The chapters 05 to 08 never call Stage.update:
+    stage = Stage()
+    target = GameObj(image="worm0", pos=(100, 200))
+    target.appear_on_stage(stage)
+    bullet = GameObj(image="worm0", pos=(0, 100), fast=True)
+    bullet.appear_on_stage(stage)
+    bullet.move(200)
+    pgzero.clock.tick(1 / 60)
+    bullet.angle = -90
+    bullet.move(200)
+    # The straight line from (0, 100) to (200, 300) crosses the target,
+    # but the path of this frame does not:
+    assert bullet.pos == (200, 300)
+    assert not bullet.overlaps(target)
+
+
+def test_grid_finds_all_overlapping_rotated_boxes():
+    rotation_cache = pgzo.rotation_cache
+    angle_step = rotation_cache.angle_step
+    rotation_cache.angle_step = 15
+    try:
+        random.seed(28)
+        stage = Stage()
+        boxes = []
+        for dummy in range(150):
+            box = GameObj(image=random.choice(["worm0", "lobster0"]),
+                          pos=(random.uniform(0, 200),
+                               random.uniform(0, 200)),
+                          collision_shape="obb")
+            box.angle = random.uniform(0, 360)
+            box.appear_on_stage(stage)
+            boxes.append(box)
+        for box in boxes:
+            expected = {other for other in boxes
+                        if other is not box and box.overlaps(other)}
+            found = set(stage.get_overlapping_objects(box))
+            assert found == expected
+    finally:
+        rotation_cache.angle_step = angle_step